@@ -1,11 +1,22 @@
 import streamlit as st
-import fitz  # PyMuPDF
-from pypdf import PdfReader, PdfWriter
-import io
-import re
 import os
+import tempfile
+from functools import partial
 import openai
 from dotenv import load_dotenv
+from pdfcore.replace import replace_in_pdf
+from pdfcore.parallel import replace_in_pdf_parallel
+from pdfcore.cache import get_document_cache
+from pdfcore.source import DocumentSource
+from pdfcore.text_index import TextIndex, count_by_page
+from pdfcore.analyzer import analyze_pdf, as_record, write_csv, write_parquet
+from pdfcore.tables import StatementTable
+from pdfcore.qa import OpenAIChatClient, answer_from_text, answer_question
+from pdfcore.retrieval import RetrievalIndex, format_context
+from pdfcore.commands import parse_edit_command
+from pdfcore.llm_cache import CachedChatClient, get_response_cache
+from pdfcore.optimize import format_savings, optimize_bytes
+from pdfcore.render import PREVIEW_ZOOM, THUMBNAIL_ZOOM, render_page, screen_pages
 
 # Load environment variables (for OpenAI key if present)
 load_dotenv()
@@ -33,37 +44,55 @@ with st.sidebar:
             openai.api_key = api_key_input
             st.success("Key set for this session!")
 
+    st.divider()
+    st.info("**Performance**")
+    parallel_mode = st.checkbox("Parallel processing (large PDFs)", value=False)
+    # The default must lie within [min_value, max_value] or the widget raises
+    parallel_workers = st.number_input("Worker processes", min_value=2, max_value=64, value=min(max(os.cpu_count() or 2, 2), 64), disabled=not parallel_mode)
+    optimize_output = st.checkbox("Optimize output size", value=True, help="Removes leftover objects, merges duplicate fonts/images and recompresses streams.")
+    response_stats = get_response_cache().stats()
+    st.caption(f"AI response cache: {response_stats['hits']} hits / {response_stats['misses']} misses, {response_stats['entries']} stored")
+
 if not uploaded_file:
     st.info("Please upload a PDF to get started.")
     st.stop()
 
-# Load PDF with PyMuPDF
-doc = fitz.open(stream=uploaded_file.read(), filetype="pdf")
+# Load PDF with PyMuPDF, once per upload: reruns reuse the cached parse
+def load_cached_document(uploaded_file):
+    """
+    Returns the CachedDocument for the upload. The content hash is remembered
+    per upload in session state, so reruns skip both hashing and parsing.
+    """
+    doc_keys = st.session_state.setdefault("doc_keys", {})
+    file_id = getattr(uploaded_file, "file_id", None)
+    key = doc_keys.get(file_id)
+    cache = get_document_cache()
+    cached = cache.get(key) if key else None
+    if cached is None:
+        # The cache keeps one shared buffer per upload; edits open clones of it
+        cached = cache.get_or_load(DocumentSource.from_fileobj(uploaded_file), key=key)
+        if file_id:
+            doc_keys[file_id] = cached.key
+    return cached
+
+cached_doc = load_cached_document(uploaded_file)
 
 # Tabs
-tab_magic, tab_manual, tab_extract, tab_ai = st.tabs(["✨ Magic Edit", "✏️ Manual Edit", "📊 Analyzer", "🤖 AI Chat"])
+tab_magic, tab_manual, tab_extract, tab_ai, tab_preview = st.tabs(["✨ Magic Edit", "✏️ Manual Edit", "📊 Analyzer", "🤖 AI Chat", "👁️ Preview"])
 
-# Helper function to process natural language command with LLM
-def parse_edit_command(command_text):
+# Helper function to run a find/replace over the uploaded PDF
+def run_replacement(find_text, replace_with, match_case=False):
     """
-    Uses OpenAI to extract 'find_text' and 'replace_text' from natural language.
+    Returns (output_bytes, count); output_bytes is None when nothing matched.
     """
-    if not openai.api_key:
-        return None, None, "OpenAI API Key required for smart parsing."
-    
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a command parser. Extract the 'find' text and 'replace' text from the user's edit instruction. Return ONLY a JSON object: {\"find\": \"...\", \"replace\": \"...\"}. If the user says 'delete X', replace should be empty string. Example: 'Change 2023 to 2024' -> {\"find\": \"2023\", \"replace\": \"2024\"}"},
-                {"role": "user", "content": command_text}
-            ]
-        )
-        import json
-        result = json.loads(response.choices[0].message.content)
-        return result.get("find"), result.get("replace"), None
-    except Exception as e:
-        return None, None, str(e)
+    if parallel_mode:
+        output_bytes, count = replace_in_pdf_parallel(cached_doc.data, find_text, replace_with, match_case=match_case, workers=int(parallel_workers))
+    else:
+        output_bytes, count = replace_in_pdf(cached_doc.data, find_text, replace_with, match_case=match_case)
+    if optimize_output and output_bytes:
+        output_bytes, before, after = optimize_bytes(output_bytes)
+        st.caption(f"Output optimized: {format_savings(before, after)}")
+    return output_bytes, count
 
 # ==========================================
 # TAB 1: MAGIC EDIT (Natural Language)
@@ -90,36 +119,15 @@ with tab_magic:
                 st.success(f"AI Plan: Find **'{find_val}'** -> Replace with **'{replace_val}'**")
                 
                 # Apply Edit
-                output_doc = fitz.open(stream=uploaded_file.getvalue(), filetype="pdf")
-                count = 0
-                
-                for page in output_doc:
-                    text_instances = page.search_for(find_val)
-                    for rect in text_instances:
-                        count += 1
-                        # 1. Redact (White out)
-                        page.add_redact_annot(rect, fill=(1, 1, 1))
-                        page.apply_redactions()
-                        
-                        # 2. Insert new text
-                        fontsize = rect.height * 0.8 
-                        page.insert_text(
-                            point=rect.tl + (0, rect.height * 0.75),
-                            text=replace_val,
-                            fontsize=fontsize,
-                            color=(0, 0, 0)
-                        )
+                with st.spinner("Applying edit..."):
+                    output_bytes, count = run_replacement(find_val, replace_val)
                 
                 if count > 0:
                     st.success(f"✅ Successfully updated {count} places!")
                     
-                    output_buffer = io.BytesIO()
-                    output_doc.save(output_buffer)
-                    output_doc.close()
-                    
                     st.download_button(
                         label="Download Edited PDF",
-                        data=output_buffer.getvalue(),
+                        data=output_bytes,
                         file_name="magic_edited_document.pdf",
                         mime="application/pdf"
                     )
@@ -145,13 +153,28 @@ with tab_manual:
         if not search_text:
             st.error("Please enter text to find.")
         else:
-            found_count = 0
-            for page in doc:
-                text_instances = page.search_for(search_text)
-                found_count += len(text_instances)
+            # Word index is built once per document and reused for every query
+            text_index = cached_doc.get_index("text", TextIndex.from_cached)
+            matches = text_index.search(search_text, match_case=match_case)
+            page_counts = count_by_page(matches)
+            found_count = len(matches)
             
             if found_count > 0:
                 st.success(f"Found {found_count} instances of '{search_text}'.")
+                st.dataframe(
+                    {"Page": [p + 1 for p in page_counts], "Matches": list(page_counts.values())},
+                    use_container_width=True
+                )
+                
+                # Highlighted previews of the first pages with hits
+                PREVIEW_PAGES = 3
+                hit_pages = list(page_counts)[:PREVIEW_PAGES]
+                cols = st.columns(len(hit_pages))
+                for col, pno in zip(cols, hit_pages):
+                    rects = [rect for m in matches if m.page == pno for rect in m.rects]
+                    png = render_page(cached_doc, pno, zoom=THUMBNAIL_ZOOM * 2, highlights=rects,
+                                      highlight_key=(search_text, match_case))
+                    col.image(png, caption=f"Page {pno + 1}", use_container_width=True)
             else:
                 st.warning(f"No instances of '{search_text}' found.")
 
@@ -159,41 +182,15 @@ with tab_manual:
         if not search_text:
             st.error("Please enter text to find.")
         else:
-            # Create a copy of the doc for editing
-            output_doc = fitz.open(stream=uploaded_file.getvalue(), filetype="pdf")
-            
-            count = 0
-            for page in output_doc:
-                # Search for text
-                text_instances = page.search_for(search_text)
-                
-                for rect in text_instances:
-                    count += 1
-                    # 1. Redact (Remove) old text
-                    page.add_redact_annot(rect, fill=(1, 1, 1)) # Fill with white
-                    page.apply_redactions()
-                    
-                    # 2. Insert new text
-                    # Heuristic to guess font size based on rect height
-                    fontsize = rect.height * 0.8 
-                    page.insert_text(
-                        point=rect.tl + (0, rect.height * 0.75), # Baseline adjustment
-                        text=replace_text,
-                        fontsize=fontsize,
-                        color=(0, 0, 0) # Black text
-                    )
+            # Edit a copy of the uploaded doc
+            output_bytes, count = run_replacement(search_text, replace_text, match_case=match_case)
             
             if count > 0:
                 st.success(f"Replaced {count} instances!")
                 
-                # Save to buffer
-                output_buffer = io.BytesIO()
-                output_doc.save(output_buffer)
-                output_doc.close()
-                
                 st.download_button(
                     label="Download Modified PDF",
-                    data=output_buffer.getvalue(),
+                    data=output_bytes,
                     file_name="modified_document.pdf",
                     mime="application/pdf"
                 )
@@ -207,36 +204,82 @@ with tab_extract:
     st.header("Statement Data Extractor")
     st.markdown("Extract structured data like **Dates**, **Amounts**, and **Descriptions** from statements.")
     
-    # Extract text from first page for analysis
-    page1_text = doc[0].get_text()
+    # Extract text from first page for analysis (cached across reruns)
+    page1_text = cached_doc.page_text(0)
     
     st.subheader("Raw Text Preview (Page 1)")
     st.text_area("Content", page1_text, height=200)
     
-    st.subheader("Detected Values")
+    st.subheader("Detected Transactions")
     
-    # Simple Regex-based extraction (Simulation of "Deriving Values")
-    # 1. Dates
-    dates = re.findall(r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}', page1_text)
-    # 2. Currency
-    amounts = re.findall(r'\$?\s?\d{1,3}(?:,\d{3})*(?:\.\d{2})?', page1_text)
+    # Built on request once per document; later reruns reuse the cached table
+    if st.button("Detect Transactions"):
+        st.session_state["table_doc"] = cached_doc.key
     
-    c1, c2 = st.columns(2)
-    with c1:
-        st.write("📅 **Potential Dates**")
-        if dates:
-            st.dataframe({"Date": list(set(dates))}, use_container_width=True)
+    if st.session_state.get("table_doc") == cached_doc.key:
+        # Layout-aware table: words grouped into rows/columns, then typed with pandas
+        statement = cached_doc.get_index("statement_table", StatementTable.from_cached)
+        summary = statement.summary()
+    
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Transactions", summary["transactions"])
+        c2.metric("Balance checks", summary["balance_checks"])
+        c3.metric("Balance mismatches", summary["balance_mismatches"])
+    
+        if summary["transactions"]:
+            st.dataframe(statement.frame, use_container_width=True)
+            if summary["balance_mismatches"]:
+                st.warning("Some rows do not reconcile with the running balance (balance_ok = False).")
         else:
-            st.write("No dates found.")
+            st.write("No transaction table detected.")
+    
+    st.subheader("Export All Rows (Streaming)")
+    st.caption(f"Walks all {cached_doc.page_count} pages one at a time and streams rows to the export file.")
+    export_format = st.radio("Export format", ["CSV", "Parquet"], horizontal=True)
+    
+    if st.button("Analyze All Pages"):
+        PREVIEW_ROWS = 500
+        progress = st.progress(0.0, text="Analyzing...")
+        table = st.empty()
+        preview = []
+        
+        def track(rows):
+            # Update the UI as rows stream past; only the first rows are kept
+            for n, row in enumerate(rows, start=1):
+                if len(preview) < PREVIEW_ROWS:
+                    preview.append(as_record(row))
+                if n % 100 == 0:
+                    progress.progress(row.page / cached_doc.page_count, text=f"Page {row.page}: {n} rows")
+                    table.dataframe(preview, use_container_width=True)
+                yield row
+        
+        suffix = ".csv" if export_format == "CSV" else ".parquet"
+        export_file = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+        export_file.close()
+        try:
+            rows = track(analyze_pdf(cached_doc.data))
+            if export_format == "CSV":
+                with open(export_file.name, "w", newline="", encoding="utf-8") as f:
+                    row_count = write_csv(rows, f)
+            else:
+                row_count = write_parquet(rows, export_file.name)
             
-    with c2:
-        st.write("💰 **Potential Amounts**")
-        # Filter out empty or non-money strings
-        valid_amounts = [a for a in amounts if any(char.isdigit() for char in a) and len(a) > 1]
-        if valid_amounts:
-            st.dataframe({"Amount": list(set(valid_amounts))}, use_container_width=True)
-        else:
-            st.write("No amounts found.")
+            progress.progress(1.0, text=f"Done: {row_count} rows")
+            table.dataframe(preview, use_container_width=True)
+            if row_count > 0:
+                with open(export_file.name, "rb") as f:
+                    st.download_button(
+                        label=f"Download Transactions ({export_format})",
+                        data=f,
+                        file_name=f"transactions{suffix}",
+                        mime="text/csv" if export_format == "CSV" else "application/octet-stream"
+                    )
+            else:
+                st.warning("No transaction rows (date + amount on one line) found.")
+        except ImportError as e:
+            st.error(str(e))
+        finally:
+            os.unlink(export_file.name)
 
 # ==========================================
 # TAB 4: AI ASSISTANT
@@ -247,26 +290,69 @@ with tab_ai:
     
     user_prompt = st.text_area("Ask AI about this document:", "Summarize this bank statement and tell me the total balance.")
     
+    ai_mode = st.radio(
+        "Context sent to the AI",
+        ["Relevant passages (fast)", "Whole document (thorough)"],
+        horizontal=True,
+        help="Relevant passages are picked by a local search index; the whole-document mode reads every page."
+    )
+    if ai_mode.startswith("Relevant"):
+        c1, c2 = st.columns(2)
+        with c1:
+            top_k = st.slider("Passages to send", min_value=2, max_value=20, value=8)
+        with c2:
+            use_embeddings = st.checkbox("Local embeddings (needs sentence-transformers)", value=False)
+    
     if st.button("Analyze with AI"):
         if not openai.api_key:
             st.error("OpenAI API Key is required for this feature.")
         else:
             with st.spinner("AI is thinking..."):
                 try:
-                    # Limit text to avoid token limits (first 2000 chars)
-                    context_text = page1_text[:3000]
-                    
-                    response = openai.chat.completions.create(
-                        model="gpt-3.5-turbo",
-                        messages=[
-                            {"role": "system", "content": "You are a helpful financial assistant. Analyze the following document text."},
-                            {"role": "user", "content": f"Document Content:\n{context_text}\n\nQuestion: {user_prompt}"}
-                        ]
-                    )
+                    # Identical (document, question) prompts are answered from the response cache
+                    client = CachedChatClient(OpenAIChatClient(api_key=openai.api_key), get_response_cache())
+                    if ai_mode.startswith("Relevant"):
+                        # Index is built offline once per document and cached by content hash
+                        index_name = "retrieval:embeddings" if use_embeddings else "retrieval"
+                        retrieval = cached_doc.get_index(index_name, partial(RetrievalIndex.from_cached, embeddings=use_embeddings))
+                        passages = retrieval.search(user_prompt, top_k=top_k)
+                        ai_reply = answer_from_text(user_prompt, format_context(passages), client)
+                        pages = sorted({p.page for p in passages})
+                        caption = f"Sent {len(passages)} passages from pages {', '.join(map(str, pages))}." if pages else "No matching passages found."
+                    else:
+                        # Whole document, split into token-bounded chunks and answered map-reduce style
+                        page_texts = [cached_doc.page_text(pno) for pno in range(cached_doc.page_count)]
+                        ai_reply, chunk_count = answer_question(user_prompt, page_texts, client)
+                        caption = f"Read {cached_doc.page_count} pages in {chunk_count} chunks."
                     
-                    ai_reply = response.choices[0].message.content
                     st.markdown("### AI Response")
+                    st.caption(caption)
                     st.write(ai_reply)
                     
                 except Exception as e:
                     st.error(f"AI Error: {e}")
+
+# ==========================================
+# TAB 5: PAGE PREVIEW
+# ==========================================
+with tab_preview:
+    st.header("👁️ Page Preview")
+    st.markdown("Thumbnails are rendered only for the pages on screen and cached.")
+    
+    c1, c2 = st.columns(2)
+    with c1:
+        per_screen = st.selectbox("Pages per screen", [6, 12, 24], index=1)
+    screen_count = (cached_doc.page_count + per_screen - 1) // per_screen
+    with c2:
+        screen = st.number_input(f"Screen (1-{screen_count})", min_value=1, max_value=screen_count, value=1) - 1
+    
+    # Lazy: only this screen's pages are rasterized
+    pages = screen_pages(cached_doc.page_count, screen, per_screen)
+    COLUMNS = 6
+    for row_start in range(pages.start, pages.stop, COLUMNS):
+        cols = st.columns(COLUMNS)
+        for col, pno in zip(cols, range(row_start, min(row_start + COLUMNS, pages.stop))):
+            col.image(render_page(cached_doc, pno), caption=f"Page {pno + 1}", use_container_width=True)
+    
+    zoom_page = st.number_input(f"Open page (1-{cached_doc.page_count})", min_value=1, max_value=cached_doc.page_count, value=pages.start + 1)
+    st.image(render_page(cached_doc, zoom_page - 1, zoom=PREVIEW_ZOOM), caption=f"Page {zoom_page}")
@@ -1,30 +1,39 @@
-from models import Agent, Task, Metric
-from datetime import datetime
+from metric_buffer import metric_buffer
+from task_queue import complete_task
+import os
 import time
-import random
+
+# Simulated work per task; benchmarks set AGENT_WORK_SECONDS=0 to measure queue overhead
+WORK_SECONDS = float(os.environ.get("AGENT_WORK_SECONDS", "2"))
 
 class BaseAgent:
-    def __init__(self, db_session, agent_model):
+    def __init__(self, db_session, agent_model, owner=None):
         self.db = db_session
         self.agent = agent_model
+        # Lease owner of the worker running this agent (see task_queue.claim_task)
+        self.owner = owner
 
-    def update_status(self, status):
-        self.agent.status = status
-        self.agent.last_active = datetime.utcnow()
-        self.db.commit()
+    def complete(self, task, result):
+        """
+        Stores the result and releases the agent in one transaction.
+        Returns False if the task's lease was lost to another worker, in
+        which case the result is discarded.
+        """
+        completed = complete_task(self.db, task.id, self.agent.id, self.owner, result)
+        if not completed:
+            print(f"Task {task.id}: lease lost, result discarded")
+        return completed
 
     def log_metric(self, name, value):
-        metric = Metric(agent_id=self.agent.id, metric_name=name, value=value)
-        self.db.add(metric)
-        self.db.commit()
+        # Buffered and written in bulk; see metric_buffer.MetricBuffer
+        metric_buffer.add(self.agent.id, name, value)
 
 class SalesAgent(BaseAgent):
     def process_task(self, task):
-        self.update_status("busy")
         print(f"Sales Agent processing task: {task.description}")
         
         # Simulate work
-        time.sleep(2)
+        time.sleep(WORK_SECONDS)
         
         description = task.description.lower()
         if "reach out" in description or "lead" in description:
@@ -38,21 +47,15 @@ class SalesAgent(BaseAgent):
         else:
             result = "Task processed: General sales inquiry handled."
             
-        task.result = result
-        task.status = "completed"
-        task.completed_at = datetime.utcnow()
-        self.db.commit()
-        
-        self.log_metric("sales_activities", 1)
-        self.update_status("idle")
+        if self.complete(task, result):
+            self.log_metric("sales_activities", 1)
         return result
 
 class SupportAgent(BaseAgent):
     def process_task(self, task):
-        self.update_status("busy")
         print(f"Support Agent processing task: {task.description}")
         
-        time.sleep(2)
+        time.sleep(WORK_SECONDS)
         
         description = task.description.lower()
         if "product" in description:
@@ -64,21 +67,15 @@ class SupportAgent(BaseAgent):
         else:
             result = "Support query processed: Standard troubleshooting steps provided."
             
-        task.result = result
-        task.status = "completed"
-        task.completed_at = datetime.utcnow()
-        self.db.commit()
-        
-        self.log_metric("tickets_processed", 1)
-        self.update_status("idle")
+        if self.complete(task, result):
+            self.log_metric("tickets_processed", 1)
         return result
 
 class OperationsAgent(BaseAgent):
     def process_task(self, task):
-        self.update_status("busy")
         print(f"Operations Agent processing task: {task.description}")
         
-        time.sleep(2)
+        time.sleep(WORK_SECONDS)
         
         description = task.description.lower()
         if "sla" in description:
@@ -90,11 +87,6 @@ class OperationsAgent(BaseAgent):
         else:
             result = "Operations task completed: System check passed."
             
-        task.result = result
-        task.status = "completed"
-        task.completed_at = datetime.utcnow()
-        self.db.commit()
-        
-        self.log_metric("ops_checks", 1)
-        self.update_status("idle")
+        if self.complete(task, result):
+            self.log_metric("ops_checks", 1)
         return result
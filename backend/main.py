@@ -1,18 +1,21 @@
-from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, Query, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Optional
 from pydantic import BaseModel
 import models
-from models import SessionLocal, engine, Agent, Task, Metric
+from models import SessionLocal, Agent, Task, Metric
 import agents
-import threading
-import time
-import asyncio
+from task_queue import WorkerPool, claim_task, concurrency_limits, fail_task
+from metric_buffer import metric_buffer
+from rollups import default_bucket, naive_utc, query_series
+from datetime import datetime, timedelta
+import base64
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
+# Create tables and add columns missing from older databases
+models.init_db()
 
 app = FastAPI()
 
@@ -23,6 +26,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser clients read the pagination cursor
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Dependency
@@ -49,10 +54,11 @@ class TaskResponse(BaseModel):
     class Config:
         from_attributes = True
 
+AGENT_TYPES = ["sales", "support", "operations"]
+
 # Initialize Agents
 def initialize_agents(db: Session):
-    agent_types = ["sales", "support", "operations"]
-    for agent_type in agent_types:
+    for agent_type in AGENT_TYPES:
         agent = db.query(Agent).filter(Agent.type == agent_type).first()
         if not agent:
             new_agent = Agent(name=f"{agent_type.capitalize()} Agent", type=agent_type, status="idle")
@@ -60,56 +66,64 @@ def initialize_agents(db: Session):
             db.commit()
 
 # Background Worker
-def process_tasks():
-    while True:
-        db = SessionLocal()
+def make_agent(db: Session, agent_model: Agent, owner: Optional[str] = None):
+    # Instantiate the appropriate agent class
+    if agent_model.type == "sales":
+        return agents.SalesAgent(db, agent_model, owner)
+    elif agent_model.type == "support":
+        return agents.SupportAgent(db, agent_model, owner)
+    elif agent_model.type == "operations":
+        return agents.OperationsAgent(db, agent_model, owner)
+    return None
+
+def run_task(task_id: int):
+    db = SessionLocal()
+    try:
+        # The queue only carries ids: claim the task first, so it runs once
+        # even if another thread or process was handed the same id
+        if not claim_task(db, task_id, worker_pool.owner):
+            return
+        task = db.query(Task).filter(Task.id == task_id).first()
+        agent_model = db.query(Agent).filter(Agent.id == task.agent_id).first()
+        agent_logic = make_agent(db, agent_model, worker_pool.owner) if agent_model else None
+
+        # Process the task; the agent completes it in a single transaction
         try:
-            # Find pending tasks
-            pending_tasks = db.query(Task).filter(Task.status == "pending").all()
-            
-            for task in pending_tasks:
-                agent_model = db.query(Agent).filter(Agent.id == task.agent_id).first()
-                if agent_model:
-                    # Instantiate the appropriate agent class
-                    if agent_model.type == "sales":
-                        agent_logic = agents.SalesAgent(db, agent_model)
-                    elif agent_model.type == "support":
-                        agent_logic = agents.SupportAgent(db, agent_model)
-                    elif agent_model.type == "operations":
-                        agent_logic = agents.OperationsAgent(db, agent_model)
-                    else:
-                        continue
-
-                    # Process the task
-                    try:
-                        # Update task status to in_progress
-                        task.status = "in_progress"
-                        db.commit()
-                        
-                        agent_logic.process_task(task)
-                    except Exception as e:
-                        print(f"Error processing task {task.id}: {e}")
-                        task.status = "failed"
-                        task.result = str(e)
-                        db.commit()
-            
+            if agent_logic is None:
+                raise ValueError(f"No agent can process task {task.id}")
+            agent_logic.process_task(task)
         except Exception as e:
-            print(f"Error in worker loop: {e}")
-        finally:
-            db.close()
-        
-        time.sleep(2)  # Check every 2 seconds
+            print(f"Error processing task {task.id}: {e}")
+            db.rollback()
+            fail_task(db, task_id, task.agent_id, worker_pool.owner, str(e))
+    finally:
+        db.close()
+
+# Start background workers on startup
+worker_pool = None
 
-# Start background worker on startup
 @app.on_event("startup")
 def startup_event():
+    global worker_pool
     db = SessionLocal()
     initialize_agents(db)
+    metric_buffer.start()
+    worker_pool = WorkerPool(run_task, concurrency_limits(AGENT_TYPES))
+    # Durability: pick up tasks that were queued before the last shutdown
+    recovered = worker_pool.scan(db)
+    if recovered:
+        print(f"Recovered {recovered} pending tasks")
     db.close()
     
-    # Start worker thread
-    worker_thread = threading.Thread(target=process_tasks, daemon=True)
-    worker_thread.start()
+    # Start worker threads
+    worker_pool.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    if worker_pool:
+        worker_pool.stop()
+    # After the workers, so their last metrics are included
+    metric_buffer.stop()
 
 # API Endpoints
 
@@ -117,14 +131,107 @@ def startup_event():
 def get_agents(db: Session = Depends(get_db)):
     return db.query(Agent).all()
 
+# Public task columns; the lease columns are internal to the worker pool
+TASK_COLUMNS = [Task.id, Task.description, Task.status, Task.result, Task.created_at, Task.completed_at, Task.agent_id]
+# Columns returned with fields=summary: everything a poller needs, without
+# the (possibly large) result text
+TASK_SUMMARY_COLUMNS = [column for column in TASK_COLUMNS if column is not Task.result]
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(task):
+    raw = f"{task.created_at.isoformat()}|{task.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, task_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(task_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def task_query(db: Session, fields: Optional[str]):
+    if fields == "summary":
+        return db.query(*TASK_SUMMARY_COLUMNS)
+    if fields not in (None, "full"):
+        raise HTTPException(status_code=400, detail="fields must be 'summary' or 'full'")
+    return db.query(*TASK_COLUMNS)
+
+def task_row(row):
+    return dict(row._mapping)
+
 @app.get("/tasks")
-def get_tasks(db: Session = Depends(get_db)):
-    return db.query(Task).order_by(Task.created_at.desc()).limit(20).all()
+def get_tasks(
+    response: Response,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    agent_type: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Tasks, newest first. Pages are keyed on (created_at, id), so deep pages
+    cost the same as the first one: pass the X-Next-Cursor response header
+    back as `cursor` to get the next page; it is absent on the last page.
+    Filters by status and agent type; fields=summary leaves out the result.
+    """
+    query = task_query(db, fields)
+    if status:
+        query = query.filter(Task.status == status)
+    if agent_type:
+        agent_ids = [agent_id for (agent_id,) in db.query(Agent.id).filter(Agent.type == agent_type)]
+        if not agent_ids:
+            return []
+        # A plain equality lets SQLite walk ix_tasks_agent_id_created_at in order
+        query = query.filter(Task.agent_id == agent_ids[0] if len(agent_ids) == 1 else Task.agent_id.in_(agent_ids))
+    if cursor:
+        created_at, task_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Task.created_at, Task.id) < tuple_(created_at, task_id))
+    # One extra row tells whether there is a next page
+    rows = query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1])
+    return [task_row(row) for row in rows]
+
+@app.get("/tasks/{task_id}")
+def get_task(task_id: int, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    row = task_query(db, fields).filter(Task.id == task_id).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task_row(row)
 
 @app.get("/metrics")
 def get_metrics(db: Session = Depends(get_db)):
     return db.query(Metric).order_by(Metric.timestamp.desc()).limit(20).all()
 
+@app.get("/metrics/series")
+def get_metric_series(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: Optional[int] = None,
+    metric_name: Optional[str] = None,
+    agent_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Metric counts and totals per agent and metric name, in buckets of
+    `bucket` seconds (a multiple of 60) over [start, end). Defaults to the
+    last hour with a bucket size giving at most ~200 points. Served from
+    the rollup tables, so the row count depends on the window and bucket,
+    not on how many metrics were logged.
+    """
+    # The newest metrics may still be buffered in memory
+    metric_buffer.flush()
+    # Browsers send UTC with a "Z" suffix; defaults and buckets use naive UTC
+    end = naive_utc(end) if end else datetime.utcnow()
+    start = naive_utc(start) if start else end - timedelta(hours=1)
+    try:
+        return query_series(db, start, end, bucket or default_bucket(start, end), metric_name, agent_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/tasks")
 def create_task(task: TaskCreate, db: Session = Depends(get_db)):
     # Find agent
@@ -136,7 +243,9 @@ def create_task(task: TaskCreate, db: Session = Depends(get_db)):
     db.add(new_task)
     db.commit()
     db.refresh(new_task)
-    return new_task
+    # Wake a worker now instead of waiting for a poll
+    worker_pool.submit(agent.type, new_task.id)
+    return {column.key: getattr(new_task, column.key) for column in TASK_COLUMNS}
 
 # Mount static files
 app.mount("/", StaticFiles(directory="static", html=True), name="static")
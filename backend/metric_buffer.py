@@ -0,0 +1,95 @@
+from datetime import datetime
+import atexit
+import os
+import threading
+
+from models import engine, Metric
+from rollups import apply_rollups
+
+# A flush happens when this many rows are waiting or the oldest has waited
+# this long, whichever comes first.
+FLUSH_ROWS = int(os.environ.get("METRIC_FLUSH_ROWS", "200"))
+FLUSH_SECONDS = float(os.environ.get("METRIC_FLUSH_SECONDS", "2"))
+
+
+class MetricBuffer:
+    """
+    Collects metric rows in memory and writes them with one bulk INSERT per
+    flush, so logging a metric costs no commit of its own. The same
+    transaction folds the rows into the metric rollups. Rows not yet
+    flushed are lost if the process is killed; a clean shutdown (and
+    interpreter exit) flushes them.
+    """
+
+    def __init__(self, flush_rows=FLUSH_ROWS, flush_seconds=FLUSH_SECONDS):
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._rows = []
+        self._lock = threading.Lock()
+        # Serializes flushes so rows are written in the order they were added
+        self._flush_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def add(self, agent_id, metric_name, value, timestamp=None):
+        with self._lock:
+            self._rows.append({
+                "agent_id": agent_id,
+                "metric_name": metric_name,
+                "value": value,
+                "timestamp": timestamp or datetime.utcnow(),
+            })
+            full = len(self._rows) >= self.flush_rows
+        if full:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes every buffered row in one transaction. Returns the row count.
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+            try:
+                with engine.begin() as conn:
+                    conn.execute(Metric.__table__.insert(), rows)
+                    apply_rollups(conn, rows)
+            except Exception:
+                # Keep the rows for the next attempt, ahead of newer ones
+                with self._lock:
+                    self._rows[:0] = rows
+                raise
+            return len(rows)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._rows)
+
+    def _run(self):
+        while not self._stopping.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing metrics: {e}")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="metric-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background flusher and writes what is left.
+        """
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(self.flush_seconds + 5)
+            self._thread = None
+        self.flush()
+
+
+metric_buffer = MetricBuffer()
+atexit.register(metric_buffer.flush)
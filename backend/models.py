@@ -1,11 +1,40 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, DateTime, ForeignKey, Text, Index, UniqueConstraint, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
+import os
 
 DATABASE_URL = "sqlite:///./ai_console.db"
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Every worker thread, the lease keeper and FastAPI's request threadpool hold
+# a connection at times; WAL lets the readers among them run alongside the
+# single writer, so the pool is sized for all of them rather than the default 5.
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    pool_size=int(os.environ.get("DB_POOL_SIZE", "20")),
+    max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", "20")),
+    pool_timeout=30,
+)
+
+# Milliseconds a connection waits for a competing writer before failing
+BUSY_TIMEOUT_MS = 5000
+
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL: readers never block the writer and vice versa; the setting is
+    # stored in the database file, the others are per connection
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # Durable at checkpoints instead of every commit; safe with WAL
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    # Wait for a competing writer (another thread or process) instead of
+    # failing with "database is locked"
+    cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-16000")  # 16 MB page cache
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -16,6 +45,7 @@ class Agent(Base):
     name = Column(String, index=True)
     type = Column(String)  # 'sales', 'support', 'operations'
     status = Column(String, default="idle")  # 'idle', 'busy', 'error'
+    active_tasks = Column(Integer, default=0, nullable=False)  # tasks running right now; drives status
     last_active = Column(DateTime, default=datetime.utcnow)
 
     tasks = relationship("Task", back_populates="agent")
@@ -31,9 +61,22 @@ class Task(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
     agent_id = Column(Integer, ForeignKey("agents.id"))
+    # Set when a worker claims the task; the claim lapses at lease_expires_at
+    # unless the owner keeps renewing it.
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
 
     agent = relationship("Agent", back_populates="tasks")
 
+    __table_args__ = (
+        # Pending scan (status filter, oldest first) and status filters
+        Index("ix_tasks_status_created_at", "status", "created_at"),
+        # Newest-first listing
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        # Per-agent listing
+        Index("ix_tasks_agent_id_created_at", "agent_id", "created_at"),
+    )
+
 class Metric(Base):
     __tablename__ = "metrics"
 
@@ -45,5 +88,100 @@ class Metric(Base):
 
     agent = relationship("Agent", back_populates="metrics")
 
+    __table_args__ = (
+        Index("ix_metrics_timestamp", "timestamp"),
+        Index("ix_metrics_agent_id_timestamp", "agent_id", "timestamp"),
+    )
+
+class MetricRollup(Base):
+    """
+    Metric totals per agent, metric name and time bucket, kept up to date as
+    metrics are written (see rollups.py), so charts never scan raw metrics.
+    """
+    __tablename__ = "metric_rollups"
+
+    id = Column(Integer, primary_key=True)
+    granularity = Column(String, nullable=False)  # 'minute', 'hour', 'day'
+    bucket_start = Column(DateTime, nullable=False)
+    agent_id = Column(Integer, ForeignKey("agents.id"), nullable=False)
+    metric_name = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0)
+    min_value = Column(Float)
+    max_value = Column(Float)
+
+    __table_args__ = (
+        # Upsert target, and the index behind every series query
+        UniqueConstraint("granularity", "bucket_start", "agent_id", "metric_name", name="uq_metric_rollups_bucket"),
+    )
+
+# strftime formats that truncate a timestamp to each rollup granularity,
+# in the format SQLAlchemy stores DateTime values in on SQLite
+ROLLUP_FORMATS = {
+    "minute": "%Y-%m-%d %H:%M:00.000000",
+    "hour": "%Y-%m-%d %H:00:00.000000",
+    "day": "%Y-%m-%d 00:00:00.000000",
+}
+
+def backfill_rollups(conn):
+    """
+    Rebuilds metric_rollups from the raw metrics table.
+    """
+    conn.execute(text("DELETE FROM metric_rollups"))
+    for granularity, fmt in ROLLUP_FORMATS.items():
+        conn.execute(text(
+            "INSERT INTO metric_rollups (granularity, bucket_start, agent_id, metric_name, count, total, min_value, max_value) "
+            "SELECT :granularity, strftime(:fmt, timestamp), agent_id, metric_name, COUNT(*), SUM(value), MIN(value), MAX(value) "
+            "FROM metrics WHERE timestamp IS NOT NULL AND agent_id IS NOT NULL AND metric_name IS NOT NULL "
+            "GROUP BY 2, agent_id, metric_name"
+        ), {"granularity": granularity, "fmt": fmt})
+
+# Columns added after the first release: (table, column, DDL type).
+# create_all() only creates missing tables, so migrate() adds these and
+# any new indexes to existing ai_console.db files.
+ADDED_COLUMNS = [
+    ("agents", "active_tasks", "INTEGER NOT NULL DEFAULT 0"),
+    ("tasks", "lease_owner", "VARCHAR"),
+    ("tasks", "lease_expires_at", "DATETIME"),
+]
+
+def migrate(conn):
+    existing = {}
+    for table, column, ddl in ADDED_COLUMNS:
+        if table not in existing:
+            existing[table] = {c["name"] for c in inspect(conn).get_columns(table)}
+        if column not in existing[table]:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    # Indexes declared on the models (CREATE INDEX IF NOT EXISTS)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
+    # Databases from before rollups existed: build them once
+    if (conn.execute(text("SELECT 1 FROM metrics LIMIT 1")).first()
+            and not conn.execute(text("SELECT 1 FROM metric_rollups LIMIT 1")).first()):
+        backfill_rollups(conn)
+    # Refresh the query planner's statistics when indexes were added
+    conn.execute(text("PRAGMA optimize"))
+
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    """
+    Creates missing tables and migrates older databases. Several processes
+    (uvicorn --workers) may start at once, so everything runs in a single
+    BEGIN IMMEDIATE transaction: the first process takes the write lock and
+    migrates, the others wait for it and then find nothing left to do.
+    """
+    with engine.connect() as conn:
+        # Long enough to wait out another process's rollup backfill
+        conn.exec_driver_sql("PRAGMA busy_timeout=60000")
+        try:
+            # SQLite DDL is transactional; pysqlite leaves an explicit BEGIN alone
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            Base.metadata.create_all(bind=conn)
+            migrate(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.exec_driver_sql(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            conn.commit()
@@ -0,0 +1,159 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Integer, and_, cast, func, select
+from sqlalchemy.dialects.sqlite import insert
+
+from models import MetricRollup
+
+GRANULARITY_SECONDS = {"minute": 60, "hour": 3600, "day": 86400}
+# Bucket sizes tried, smallest first, when the caller does not pick one
+DEFAULT_BUCKETS = [60, 300, 900, 3600, 6 * 3600, 86400, 7 * 86400]
+TARGET_POINTS = 200
+MAX_POINTS = 5000
+
+rollups = MetricRollup.__table__
+
+
+def truncate(ts, granularity):
+    if granularity == "minute":
+        return ts.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def apply_rollups(conn, rows):
+    """
+    Adds freshly inserted metric rows (dicts with agent_id, metric_name,
+    value, timestamp) to every rollup granularity. Runs inside the caller's
+    transaction so raw rows and rollups never disagree.
+    """
+    buckets = {}
+    for row in rows:
+        for granularity in GRANULARITY_SECONDS:
+            key = (granularity, truncate(row["timestamp"], granularity), row["agent_id"], row["metric_name"])
+            value = row["value"]
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [1, value, value, value]
+            else:
+                bucket[0] += 1
+                bucket[1] += value
+                bucket[2] = min(bucket[2], value)
+                bucket[3] = max(bucket[3], value)
+    if not buckets:
+        return 0
+
+    stmt = insert(rollups)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["granularity", "bucket_start", "agent_id", "metric_name"],
+        set_={
+            "count": rollups.c.count + stmt.excluded.count,
+            "total": rollups.c.total + stmt.excluded.total,
+            "min_value": func.min(func.coalesce(rollups.c.min_value, stmt.excluded.min_value), stmt.excluded.min_value),
+            "max_value": func.max(func.coalesce(rollups.c.max_value, stmt.excluded.max_value), stmt.excluded.max_value),
+        },
+    )
+    conn.execute(stmt, [
+        {
+            "granularity": granularity,
+            "bucket_start": bucket_start,
+            "agent_id": agent_id,
+            "metric_name": metric_name,
+            "count": count,
+            "total": total,
+            "min_value": low,
+            "max_value": high,
+        }
+        for (granularity, bucket_start, agent_id, metric_name), (count, total, low, high) in buckets.items()
+    ])
+    return len(buckets)
+
+
+def granularity_for(bucket_seconds):
+    """
+    Coarsest rollup granularity whose buckets tile bucket_seconds exactly.
+    """
+    for granularity in ("day", "hour", "minute"):
+        if bucket_seconds % GRANULARITY_SECONDS[granularity] == 0:
+            return granularity
+    raise ValueError("bucket must be a whole number of minutes (a multiple of 60 seconds)")
+
+
+def default_bucket(start, end):
+    span = (end - start).total_seconds()
+    for bucket in DEFAULT_BUCKETS:
+        if span / bucket <= TARGET_POINTS:
+            return bucket
+    return DEFAULT_BUCKETS[-1]
+
+
+def naive_utc(ts):
+    # Metric timestamps are stored as naive UTC
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def query_series(db, start, end, bucket_seconds, metric_name=None, agent_id=None):
+    """
+    Aggregates the rollups in [start, end) into buckets of bucket_seconds,
+    aligned to the Unix epoch, one series per (agent, metric name). The
+    window is rounded out to whole rollup buckets (minutes, hours or days,
+    whichever tiles bucket_seconds).
+    """
+    start, end = naive_utc(start), naive_utc(end)
+    if start >= end:
+        raise ValueError("start must be before end")
+    if bucket_seconds <= 0:
+        raise ValueError("bucket must be positive")
+    points = (end - start).total_seconds() / bucket_seconds
+    if points > MAX_POINTS:
+        raise ValueError(f"window/bucket gives {points:.0f} points per series; the limit is {MAX_POINTS}")
+    granularity = granularity_for(bucket_seconds)
+
+    epoch = cast(func.strftime("%s", rollups.c.bucket_start), Integer)
+    slot = ((epoch // bucket_seconds) * bucket_seconds).label("slot")
+    conditions = [
+        rollups.c.granularity == granularity,
+        rollups.c.bucket_start >= truncate(start, granularity),
+        rollups.c.bucket_start < end,
+    ]
+    if metric_name:
+        conditions.append(rollups.c.metric_name == metric_name)
+    if agent_id is not None:
+        conditions.append(rollups.c.agent_id == agent_id)
+    query = (
+        select(
+            slot,
+            rollups.c.agent_id,
+            rollups.c.metric_name,
+            func.sum(rollups.c.count),
+            func.sum(rollups.c.total),
+            func.min(rollups.c.min_value),
+            func.max(rollups.c.max_value),
+        )
+        .where(and_(*conditions))
+        .group_by(slot, rollups.c.agent_id, rollups.c.metric_name)
+        .order_by(rollups.c.agent_id, rollups.c.metric_name, slot)
+    )
+
+    series = {}
+    for slot_start, row_agent_id, row_metric_name, count, total, low, high in db.execute(query):
+        key = (row_agent_id, row_metric_name)
+        if key not in series:
+            series[key] = {"agent_id": row_agent_id, "metric_name": row_metric_name, "points": []}
+        series[key]["points"].append({
+            "start": datetime.fromtimestamp(slot_start, timezone.utc).replace(tzinfo=None).isoformat(),
+            "count": count,
+            "total": total,
+            "min": low,
+            "max": high,
+        })
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "bucket_seconds": bucket_seconds,
+        "granularity": granularity,
+        "series": list(series.values()),
+    }
@@ -5,6 +5,7 @@ createApp({
         const agents = ref([]);
         const tasks = ref([]);
         const metrics = ref([]);
+        const metricTotals = ref([]);
         const loading = ref(false);
 
         const fetchAgents = async () => {
@@ -34,9 +35,26 @@ createApp({
             }
         };
 
+        const fetchMetricTotals = async () => {
+            try {
+                // Hourly rollups for the last 24 hours, summed per agent and metric
+                const response = await axios.get('/metrics/series', {
+                    params: { bucket: 3600, start: new Date(Date.now() - 24 * 3600 * 1000).toISOString() }
+                });
+                metricTotals.value = response.data.series.map(series => ({
+                    key: `${series.agent_id}-${series.metric_name}`,
+                    agent_id: series.agent_id,
+                    metric_name: series.metric_name,
+                    total: series.points.reduce((sum, point) => sum + point.total, 0)
+                }));
+            } catch (error) {
+                console.error("Error fetching metric totals:", error);
+            }
+        };
+
         const refreshData = async () => {
             loading.value = true;
-            await Promise.all([fetchAgents(), fetchTasks(), fetchMetrics()]);
+            await Promise.all([fetchAgents(), fetchTasks(), fetchMetrics(), fetchMetricTotals()]);
             loading.value = false;
         };
 
@@ -100,6 +118,7 @@ createApp({
             agents,
             tasks,
             metrics,
+            metricTotals,
             loading,
             refreshData,
             assignTask,
@@ -0,0 +1,312 @@
+from collections import deque
+from datetime import datetime, timedelta
+import os
+import socket
+import threading
+import uuid
+
+from sqlalchemy import case, or_
+
+from models import SessionLocal, Agent, Task
+
+# Worker threads per agent type: AGENT_CONCURRENCY="sales=8,support=4"
+# overrides AGENT_CONCURRENCY_DEFAULT for the listed types.
+DEFAULT_CONCURRENCY = int(os.environ.get("AGENT_CONCURRENCY_DEFAULT", "4"))
+
+def concurrency_limits(agent_types, spec=None):
+    """
+    Returns {agent_type: worker_count} from the AGENT_CONCURRENCY spec.
+    """
+    spec = os.environ.get("AGENT_CONCURRENCY", "") if spec is None else spec
+    limits = {agent_type: DEFAULT_CONCURRENCY for agent_type in agent_types}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        agent_type, _, count = item.partition("=")
+        limits[agent_type.strip()] = max(1, int(count))
+    return limits
+
+# A claimed task belongs to its worker process until the lease expires;
+# the owner renews it every TASK_LEASE_SECONDS / 3 while the task runs.
+LEASE_SECONDS = float(os.environ.get("TASK_LEASE_SECONDS", "60"))
+# How often each process reclaims expired leases and looks for pending tasks
+# it was not told about (e.g. created through another process).
+SCAN_SECONDS = float(os.environ.get("TASK_SCAN_SECONDS", "30"))
+
+# Several workers (and processes) may run tasks for the same agent at once,
+# so its active count is changed in SQL rather than read-modified-written.
+def agent_started(agent_id):
+    return Agent.__table__.update().where(Agent.id == agent_id).values(
+        active_tasks=Agent.active_tasks + 1,
+        status="busy",
+        last_active=datetime.utcnow(),
+    )
+
+def agent_finished(agent_id):
+    # SQLite evaluates every SET expression against the old row
+    return Agent.__table__.update().where(Agent.id == agent_id).values(
+        active_tasks=case((Agent.active_tasks > 0, Agent.active_tasks - 1), else_=0),
+        status=case((Agent.active_tasks > 1, "busy"), else_="idle"),
+        last_active=datetime.utcnow(),
+    )
+
+def make_owner_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def claim_task(db, task_id, owner, lease_seconds=LEASE_SECONDS):
+    """
+    Atomically moves a pending task to in_progress under owner's lease and
+    counts it as active for its agent, in one transaction. The UPDATE only
+    matches while the task is still pending, so when several workers or
+    processes race for the same task exactly one gets rowcount 1.
+    Returns True if this caller now owns the task.
+    """
+    now = datetime.utcnow()
+    claimed = db.query(Task).filter(Task.id == task_id, Task.status == "pending").update({
+        Task.status: "in_progress",
+        Task.lease_owner: owner,
+        Task.lease_expires_at: now + timedelta(seconds=lease_seconds),
+    }, synchronize_session=False)
+    if not claimed:
+        db.rollback()
+        return False
+    agent_id = db.query(Task.agent_id).filter(Task.id == task_id).scalar()
+    db.execute(agent_started(agent_id))
+    db.commit()
+    return True
+
+def _finish_task(db, task_id, agent_id, owner, values):
+    # Only the current lease holder may finish a task: if the lease lapsed
+    # and the task was reclaimed, this matches nothing and changes nothing
+    query = db.query(Task).filter(Task.id == task_id, Task.status == "in_progress")
+    if owner is not None:
+        query = query.filter(Task.lease_owner == owner)
+    finished = query.update(values, synchronize_session=False)
+    if not finished:
+        db.rollback()
+        return False
+    if agent_id is not None:
+        db.execute(agent_finished(agent_id))
+    db.commit()
+    return True
+
+def complete_task(db, task_id, agent_id, owner, result):
+    """
+    Marks a claimed task completed and releases it from its agent's active
+    count in one transaction. Returns False if owner no longer holds it.
+    """
+    return _finish_task(db, task_id, agent_id, owner, {
+        Task.status: "completed",
+        Task.result: result,
+        Task.completed_at: datetime.utcnow(),
+        Task.lease_expires_at: None,
+    })
+
+def fail_task(db, task_id, agent_id, owner, error):
+    """
+    Like complete_task, for a task whose processing raised.
+    """
+    return _finish_task(db, task_id, agent_id, owner, {
+        Task.status: "failed",
+        Task.result: error,
+        Task.completed_at: datetime.utcnow(),
+        Task.lease_expires_at: None,
+    })
+
+def renew_leases(db, owner, lease_seconds=LEASE_SECONDS):
+    """
+    Extends every lease owner holds on running tasks with one UPDATE.
+    Returns the number of renewed leases.
+    """
+    renewed = db.query(Task).filter(Task.lease_owner == owner, Task.status == "in_progress").update({
+        Task.lease_expires_at: datetime.utcnow() + timedelta(seconds=lease_seconds),
+    }, synchronize_session=False)
+    db.commit()
+    return renewed
+
+def reclaim_expired(db):
+    """
+    Returns tasks whose lease has lapsed (their worker process died) to
+    pending and releases them from their agent's active count. Tasks left
+    in_progress without a lease predate leasing and are treated as lapsed.
+    Returns [(task_id, agent_type)] of the reclaimed tasks.
+    """
+    now = datetime.utcnow()
+    expired = (
+        db.query(Task.id, Task.agent_id, Agent.type)
+        .join(Agent, Task.agent_id == Agent.id)
+        .filter(Task.status == "in_progress", or_(Task.lease_expires_at == None, Task.lease_expires_at < now))
+        .all()
+    )
+    reclaimed = []
+    for task_id, agent_id, agent_type in expired:
+        # Conditional again: the owner may have renewed or finished meanwhile
+        released = db.query(Task).filter(
+            Task.id == task_id,
+            Task.status == "in_progress",
+            or_(Task.lease_expires_at == None, Task.lease_expires_at < now),
+        ).update({Task.status: "pending", Task.lease_owner: None, Task.lease_expires_at: None},
+                 synchronize_session=False)
+        if released:
+            db.execute(agent_finished(agent_id))
+            reclaimed.append((task_id, agent_type))
+    db.commit()
+    return reclaimed
+
+
+class TaskQueue:
+    """
+    In-process queue of task ids waiting to be processed.
+
+    The database stays the source of truth: create_task commits the row and
+    then put()s its id, which wakes a waiting worker immediately. Ids are
+    only hints, so workers re-check the row's status before running it.
+    """
+
+    def __init__(self):
+        self._ids = deque()
+        self._queued = set()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def put(self, task_id):
+        with self._cond:
+            if task_id in self._queued:
+                return
+            self._ids.append(task_id)
+            self._queued.add(task_id)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """
+        Blocks until a task id is available and returns it. Returns None
+        on timeout or once the queue is closed.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._ids or self._closed, timeout):
+                return None
+            if not self._ids:
+                return None
+            task_id = self._ids.popleft()
+            self._queued.discard(task_id)
+            return task_id
+
+    def close(self):
+        """
+        Wakes every waiting worker so it can exit.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._ids)
+
+
+class WorkerPool:
+    """
+    One TaskQueue and a fixed number of worker threads per agent type, so
+    a burst for one type cannot starve the others and each type's
+    parallelism is capped by its limit.
+
+    Several processes can run a pool against the same database: tasks are
+    claimed atomically under this pool's owner id (see claim_task), a
+    maintenance thread renews the pool's leases and every SCAN_SECONDS
+    reclaims lapsed leases and queues pending tasks created elsewhere.
+    handler(task_id) must claim the task before running it.
+    """
+
+    def __init__(self, handler, limits, owner=None):
+        self.handler = handler
+        self.limits = dict(limits)
+        self.owner = owner or make_owner_id()
+        self.queues = {agent_type: TaskQueue() for agent_type in self.limits}
+        self._threads = []
+        self._stopping = threading.Event()
+        # Tasks being handled right now; no leases to renew while it is 0
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+    def start(self):
+        thread = threading.Thread(target=self._maintain, name="lease-keeper", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        for agent_type, count in self.limits.items():
+            for i in range(count):
+                thread = threading.Thread(
+                    target=self._work, args=(self.queues[agent_type],),
+                    name=f"{agent_type}-worker-{i}", daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self, queue):
+        # Sleeps on the queue until create_task (or the startup recovery) hands over work
+        while True:
+            task_id = queue.get()
+            if task_id is None:
+                break
+            with self._in_flight_lock:
+                self._in_flight += 1
+            try:
+                self.handler(task_id)
+            except Exception as e:
+                print(f"Error in worker loop: {e}")
+            finally:
+                with self._in_flight_lock:
+                    self._in_flight -= 1
+
+    def submit(self, agent_type, task_id):
+        queue = self.queues.get(agent_type)
+        if queue is None:
+            raise KeyError(f"No workers for agent type {agent_type!r}")
+        queue.put(task_id)
+
+    def _maintain(self):
+        renew_every = LEASE_SECONDS / 3
+        next_scan = datetime.utcnow() + timedelta(seconds=SCAN_SECONDS)
+        while not self._stopping.wait(min(renew_every, SCAN_SECONDS)):
+            scan_due = datetime.utcnow() >= next_scan
+            # An idle pool holds no leases: skip the UPDATE and commit
+            if not self._in_flight and not scan_due:
+                continue
+            db = SessionLocal()
+            try:
+                if self._in_flight:
+                    renew_leases(db, self.owner)
+                if scan_due:
+                    self.scan(db)
+                    next_scan = datetime.utcnow() + timedelta(seconds=SCAN_SECONDS)
+            except Exception as e:
+                print(f"Error in lease maintenance: {e}")
+            finally:
+                db.close()
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        for queue in self.queues.values():
+            queue.close()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def scan(self, db):
+        """
+        Reclaims lapsed leases, then queues every pending task in creation
+        order. Used on startup (recovery after a crash or restart) and as
+        the infrequent fallback that covers tasks created by other
+        processes. Queued ids that another process claims first are
+        skipped by the handler. Returns the number of queued tasks.
+        """
+        reclaim_expired(db)
+        pending = (
+            db.query(Task.id, Agent.type)
+            .join(Agent, Task.agent_id == Agent.id)
+            .filter(Task.status == "pending")
+            .order_by(Task.created_at, Task.id)
+            .all()
+        )
+        queued = 0
+        for task_id, agent_type in pending:
+            if agent_type in self.queues:
+                self.submit(agent_type, task_id)
+                queued += 1
+        return queued
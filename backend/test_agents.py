@@ -15,13 +15,11 @@ def create_task(description, agent_type):
 def check_status(task_id):
     print(f"Checking status for task {task_id}...")
     for _ in range(10):
-        response = requests.get(f"{BASE_URL}/tasks")
-        tasks = response.json()
-        for task in tasks:
-            if task["id"] == task_id:
-                print(f"Task Status: {task['status']}, Result: {task.get('result')}")
-                if task["status"] == "completed":
-                    return
+        response = requests.get(f"{BASE_URL}/tasks/{task_id}")
+        task = response.json()
+        print(f"Task Status: {task['status']}, Result: {task.get('result')}")
+        if task["status"] == "completed":
+            return
         time.sleep(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+"""
+Task backend benchmark: end-to-end throughput and latency of the agent
+task queue, from POST /tasks until the task is marked completed.
+
+Runs the FastAPI app in-process against a fresh SQLite database in a temp
+directory (the committed ai_console.db is never touched). Run from the
+project root:
+    python -m benchmarks.bench_backend --tasks 30 --work-seconds 0
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+AGENT_TYPES = ["sales", "support", "operations"]
+
+
+def run_backend(tasks=30, work_seconds=0.0, timeout=300.0):
+    """
+    Posts `tasks` tasks round-robin across the agent types and waits until
+    all of them have finished. The backend's database lives in a temp
+    directory that is removed afterwards; the imported app and its daemon
+    threads stay behind, so call it from a dedicated process (see main).
+    Returns a dict of timings.
+    """
+    # 1. Fresh working directory: the backend uses ./ai_console.db and ./static
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench_backend_") as workdir:
+        os.makedirs(os.path.join(workdir, "static"))
+        os.chdir(workdir)
+        try:
+            result = _run_in(tasks, work_seconds, timeout)
+        finally:
+            os.chdir(cwd)
+    return result
+
+
+def _run_in(tasks, work_seconds, timeout):
+    os.environ["AGENT_WORK_SECONDS"] = str(work_seconds)
+    sys.path.insert(0, BACKEND_DIR)
+
+    from fastapi.testclient import TestClient
+    import main
+    from models import SessionLocal, Task, engine
+
+    with TestClient(main.app) as client:
+        # 2. Submit
+        start = time.perf_counter()
+        for i in range(tasks):
+            response = client.post("/tasks", json={
+                "description": f"Benchmark task {i}: answer a pricing question",
+                "agent_type": AGENT_TYPES[i % len(AGENT_TYPES)],
+            })
+            response.raise_for_status()
+        submitted = time.perf_counter() - start
+
+        # 3. Wait until nothing is pending or in progress
+        db = SessionLocal()
+        try:
+            while True:
+                open_tasks = db.query(Task).filter(Task.status.in_(["pending", "in_progress"])).count()
+                if open_tasks == 0:
+                    break
+                if time.perf_counter() - start > timeout:
+                    raise TimeoutError(f"{open_tasks} tasks still open after {timeout:.0f}s")
+                time.sleep(0.02)
+            elapsed = time.perf_counter() - start
+
+            done = db.query(Task).all()
+            latencies = sorted(
+                (t.completed_at - t.created_at).total_seconds()
+                for t in done if t.completed_at is not None
+            )
+            failed = sum(1 for t in done if t.status == "failed")
+        finally:
+            db.close()
+    # Close pooled connections before the temp directory is removed
+    engine.dispose()
+
+    return {
+        "tasks": tasks,
+        "work_seconds": work_seconds,
+        "submit_seconds": round(submitted, 4),
+        "total_seconds": round(elapsed, 4),
+        "tasks_per_sec": round(tasks / elapsed, 2),
+        "latency_p50": round(latencies[len(latencies) // 2], 4) if latencies else None,
+        "latency_max": round(latencies[-1], 4) if latencies else None,
+        "failed": failed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent task queue throughput")
+    parser.add_argument("--tasks", type=int, default=30)
+    parser.add_argument("--work-seconds", type=float, default=0.0,
+                        help="Simulated work per task (the app default is 2)")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON only")
+    args = parser.parse_args()
+
+    # The backend prints a line per task; keep stdout clean for --json
+    real_stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        result = run_backend(args.tasks, args.work_seconds, args.timeout)
+    finally:
+        sys.stdout = real_stdout
+
+    if args.json:
+        print(json.dumps(result))
+        return
+    for key, value in result.items():
+        print(f"{key:>15}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Text extraction benchmark: pages/sec per backend, serial and parallel.
+
+Run from the project root:
+    python -m benchmarks.bench_extract --pages 200 --workers 1 4
+    python -m benchmarks.bench_extract --pdf statements/big.pdf
+"""
+import argparse
+import time
+
+import fitz  # PyMuPDF
+
+from pdfcore.extract import BACKENDS, extract_text
+
+
+def make_pdf(pages, lines_per_page=45):
+    doc = fitz.open()
+    for pno in range(pages):
+        page = doc.new_page()
+        for i in range(lines_per_page):
+            page.insert_text(
+                (40, 40 + i * 16),
+                f"{pno:04d}-{i:02d}  01/{i % 28 + 1:02d}/2024  Card purchase at store #{i * 7}  ${i * 13.37:,.2f}",
+                fontsize=9,
+            )
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pdf", help="Benchmark this file instead of a synthetic one")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    args = parser.parse_args()
+
+    if args.pdf:
+        with open(args.pdf, "rb") as f:
+            data = f.read()
+    else:
+        data = make_pdf(args.pages)
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        pages = doc.page_count
+
+    print(f"{pages} pages")
+    print(f"{'backend':>8} {'workers':>8} {'seconds':>8} {'pages/sec':>10} {'chars':>10}")
+    for backend in args.backends:
+        for workers in args.workers:
+            start = time.perf_counter()
+            text = extract_text(data, backend=backend, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"{backend:>8} {workers:>8} {elapsed:>8.2f} {pages / elapsed:>10.1f} {len(text):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Find/replace benchmark: per-hit apply_redactions() vs the batched engine.
+
+The dense cases (hundreds of hits per page) show how the cost per hit
+grows with the page's content; see pdfcore.replace.REDACT_BATCH.
+
+Run from the project root:
+    python -m benchmarks.bench_replace --pages 20 --hits 1 10 50 100 400
+"""
+import argparse
+import time
+
+import fitz  # PyMuPDF
+
+from pdfcore.replace import replace_in_document
+
+FIND = "ACME"
+REPLACE = "Globex"
+
+
+def make_pdf(pages, hits_per_page):
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        y = 40
+        for i in range(hits_per_page):
+            page.insert_text((40 + (i % 4) * 130, y), f"{FIND} ref {i}", fontsize=9)
+            if i % 4 == 3:
+                y += 12
+                if y > page.rect.height - 40:
+                    y = 40
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def legacy_replace(doc, find_text, replace_text):
+    # The loop app.py used before the batched engine
+    count = 0
+    for page in doc:
+        for rect in page.search_for(find_text):
+            count += 1
+            page.add_redact_annot(rect, fill=(1, 1, 1))
+            page.apply_redactions()
+            page.insert_text(
+                point=rect.tl + (0, rect.height * 0.75),
+                text=replace_text,
+                fontsize=rect.height * 0.8,
+                color=(0, 0, 0),
+            )
+    return count
+
+
+def time_run(func, data, pages):
+    doc = fitz.open(stream=data, filetype="pdf")
+    start = time.perf_counter()
+    count = func(doc, FIND, REPLACE)
+    elapsed = time.perf_counter() - start
+    doc.close()
+    return count, elapsed / pages * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--hits", type=int, nargs="+", default=[1, 10, 50, 100, 400])
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the batched engine")
+    args = parser.parse_args()
+
+    print(f"{'hits/page':>10} {'batched ms/page':>16} {'batched ms/hit':>15} {'legacy ms/page':>15}")
+    for hits in args.hits:
+        data = make_pdf(args.pages, hits)
+        count, batched = time_run(replace_in_document, data, args.pages)
+        assert count == args.pages * hits, count
+        legacy = "-"
+        if not args.skip_legacy:
+            _, legacy_ms = time_run(legacy_replace, data, args.pages)
+            legacy = f"{legacy_ms:.1f}"
+        print(f"{hits:>10} {batched:>16.1f} {batched / hits:>15.2f} {legacy:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Synthetic PDF corpus for benchmarks: statement-like pages with a
+configurable page count, text density, fonts, images and hit frequency,
+and internal links between pages.
+
+    python -m benchmarks.corpus out/ --files 20 --pages 50 --images 1
+"""
+import argparse
+import os
+import random
+from dataclasses import asdict, dataclass, field
+
+import fitz  # PyMuPDF
+
+MERCHANTS = ["Grocery Mart", "Fuel Stop", "Coffee House", "Book Nook", "City Transit",
+             "Pharmacy Plus", "Hardware Hub", "Online Store", "Cinema 8", "Pet Supplies"]
+
+
+@dataclass
+class CorpusSpec:
+    pages: int = 20
+    lines_per_page: int = 40          # text density
+    fonts: list = field(default_factory=lambda: ["helv", "tiro", "cour"])
+    images_per_page: int = 0
+    hit_text: str = "ACME"
+    hit_frequency: float = 0.1        # share of lines containing hit_text
+    seed: int = 0
+
+
+def _image(rng, size=96):
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, size, size), 0)
+    pix.set_rect(pix.irect, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    return pix.tobytes("png")
+
+
+def generate_pdf(spec):
+    """
+    Returns the bytes of one synthetic statement following spec. Every line
+    is a transaction row (date, description, amount, running balance), so
+    the analyzers have real work to do.
+    """
+    rng = random.Random(spec.seed)
+    doc = fitz.open()
+    balance = 1000.0
+    line_height = min(16.0, 720.0 / max(spec.lines_per_page, 1))
+    fontsize = line_height * 0.65
+    for pno in range(spec.pages):
+        page = doc.new_page()
+        # One Shape per page: a single content stream write instead of one per string
+        shape = page.new_shape()
+        shape.insert_text((40, 40), f"Statement page {pno + 1}", fontsize=12, fontname=spec.fonts[0])
+        for i in range(spec.lines_per_page):
+            amount = round(rng.uniform(1, 500), 2)
+            balance = round(balance + (amount if rng.random() < 0.3 else -amount), 2)
+            merchant = rng.choice(MERCHANTS)
+            if rng.random() < spec.hit_frequency:
+                merchant = f"{spec.hit_text} {merchant}"
+            y = 70 + i * line_height
+            font = spec.fonts[i % len(spec.fonts)]
+            shape.insert_text((40, y), f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/2024", fontsize=fontsize, fontname=font)
+            shape.insert_text((130, y), merchant, fontsize=fontsize, fontname=font)
+            shape.insert_text((380, y), f"{amount:,.2f}", fontsize=fontsize, fontname=font)
+            shape.insert_text((470, y), f"{balance:,.2f}", fontsize=fontsize, fontname=font)
+        shape.commit()
+        for i in range(spec.images_per_page):
+            x = 400 + (i % 2) * 90
+            y = 760 - (i // 2) * 90
+            page.insert_image(fitz.Rect(x, y - 80, x + 80, y), stream=_image(rng))
+    # Page titles link to the last page, so edits that split the document
+    # (e.g. the parallel replace) have cross-page links to keep
+    for pno in range(spec.pages - 1):
+        doc[pno].insert_link({"kind": fitz.LINK_GOTO, "from": fitz.Rect(40, 28, 200, 44),
+                              "page": spec.pages - 1, "to": fitz.Point(40, 40)})
+    data = doc.tobytes(deflate=True)
+    doc.close()
+    return data
+
+
+def generate_corpus(directory, files, spec):
+    """
+    Writes `files` PDFs (seeds spec.seed, spec.seed + 1, ...) into directory.
+    Returns their paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(files):
+        path = os.path.join(directory, f"synthetic_{i:04d}.pdf")
+        file_spec = CorpusSpec(**{**asdict(spec), "seed": spec.seed + i})
+        with open(path, "wb") as f:
+            f.write(generate_pdf(file_spec))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=CorpusSpec.pages)
+    parser.add_argument("--lines", type=int, default=CorpusSpec.lines_per_page)
+    parser.add_argument("--fonts", nargs="+", default=CorpusSpec().fonts)
+    parser.add_argument("--images", type=int, default=CorpusSpec.images_per_page)
+    parser.add_argument("--hit-text", default=CorpusSpec.hit_text)
+    parser.add_argument("--hit-frequency", type=float, default=CorpusSpec.hit_frequency)
+    parser.add_argument("--seed", type=int, default=CorpusSpec.seed)
+    args = parser.parse_args()
+    spec = CorpusSpec(args.pages, args.lines, args.fonts, args.images, args.hit_text, args.hit_frequency, args.seed)
+    paths = generate_corpus(args.directory, args.files, spec)
+    print(f"Wrote {len(paths)} files to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Benchmark suite: times the PDF hot paths on a synthetic corpus plus the
+task backend's end-to-end throughput, and stores the results as JSON so
+runs from different commits can be compared.
+
+Run from the project root:
+    python -m benchmarks.run --pages 50 --files 5
+    python -m benchmarks.run --compare benchmarks/results/<baseline>.json --threshold 0.2
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+
+import fitz  # PyMuPDF
+
+from benchmarks.corpus import CorpusSpec, generate_corpus
+from pdfcore.analyzer import analyze_pdf
+from pdfcore.extract import BACKENDS, extract_text
+from pdfcore.merge import merge_pdfs, merge_to_file
+from pdfcore.parallel import replace_in_pdf_parallel
+from pdfcore.qa import estimate_tokens
+from pdfcore.replace import replace_in_pdf
+from pdfcore.retrieval import PASSAGE_TOKENS, RetrievalIndex, split_passages
+from pdfcore.rotate import rotate_incremental, rotate_pdf
+from pdfcore.tables import extract_transactions
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+REPLACE = "Globex"
+
+
+def median_time(func, repeat, setup=None):
+    """
+    Runs func `repeat` times and returns the median wall time in seconds.
+    setup (untimed) runs before every call, e.g. to restore an input file.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def page_contents(pdf_bytes):
+    """
+    Per page: its text and its links (target page or URI, and position).
+    """
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return [
+            (page.get_text(), [(link.get("page"), link.get("uri"), tuple(link["from"])) for link in page.get_links()])
+            for page in doc
+        ]
+
+
+def pdf_cases(paths, spec, workdir, workers):
+    """
+    The timed operations as {name: callable}. Single-file operations run on
+    the first corpus file, merges on all of them.
+    """
+    path = paths[0]
+    with open(path, "rb") as f:
+        data = f.read()
+    rotate_target = os.path.join(workdir, "rotate.pdf")
+    merged_path = os.path.join(workdir, "merged.pdf")
+
+    def analyze_stream():
+        for _ in analyze_pdf(data):
+            pass
+
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        page_texts = [page.get_text() for page in doc]
+    # Checked once, untimed: the parallel replace must match the serial one
+    serial, _ = replace_in_pdf(data, spec.hit_text, REPLACE)
+    parallel, _ = replace_in_pdf_parallel(data, spec.hit_text, REPLACE, workers=workers)
+    assert (serial is None) == (parallel is None), "serial and parallel replace disagree on hits"
+    if serial is not None:
+        assert page_contents(serial) == page_contents(parallel), "parallel replace output differs from serial"
+    # Checked once, untimed: retrieval must never hand the model a passage over budget
+    largest = max(estimate_tokens(p.text) for p in split_passages(page_texts))
+    assert largest <= PASSAGE_TOKENS, f"{largest}-token passage exceeds PASSAGE_TOKENS={PASSAGE_TOKENS}"
+
+    def analyze_tables():
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            extract_transactions(doc)
+
+    cases = {
+        "replace.serial": lambda: replace_in_pdf(data, spec.hit_text, REPLACE),
+        "replace.parallel": lambda: replace_in_pdf_parallel(data, spec.hit_text, REPLACE, workers=workers),
+        "merge.pypdf": lambda: merge_pdfs(paths, io.BytesIO()),
+        "merge.low_memory": lambda: merge_to_file(paths, merged_path),
+        "rotate.full": lambda: rotate_pdf(path, io.BytesIO(), 90),
+        "rotate.incremental": lambda: rotate_incremental(rotate_target, 90),
+        "analyze.stream": analyze_stream,
+        "analyze.tables": analyze_tables,
+        "retrieval.index": lambda: RetrievalIndex.from_pages(page_texts),
+    }
+    for backend in BACKENDS:
+        cases[f"extract.{backend}"] = lambda backend=backend: extract_text(path, backend)
+    # Incremental rotation updates the file in place; start each run from the original
+    setups = {"rotate.incremental": lambda: shutil.copyfile(path, rotate_target)}
+    return cases, setups
+
+
+def run_backend(tasks, work_seconds):
+    # A separate process: the backend changes the working directory and
+    # leaves a daemon worker thread running
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_backend", "--json",
+         "--tasks", str(tasks), "--work-seconds", str(work_seconds)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def compare(results, baseline, threshold, min_delta=0.005):
+    """
+    Compares median times against a baseline run. A case regresses when it
+    is more than threshold slower and by at least min_delta seconds (so
+    millisecond-scale noise is not reported). Returns (rows, regressions)
+    where rows are (name, baseline_s, current_s, ratio).
+    """
+    rows = []
+    regressions = []
+    for name, current in results["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before["seconds"]:
+            continue
+        ratio = current["seconds"] / before["seconds"]
+        rows.append((name, before["seconds"], current["seconds"], ratio))
+        if ratio > 1 + threshold and current["seconds"] - before["seconds"] >= min_delta:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=5, help="Corpus size (merge inputs)")
+    parser.add_argument("--pages", type=int, default=CorpusSpec.pages)
+    parser.add_argument("--lines", type=int, default=CorpusSpec.lines_per_page)
+    parser.add_argument("--images", type=int, default=CorpusSpec.images_per_page)
+    parser.add_argument("--hit-frequency", type=float, default=CorpusSpec.hit_frequency)
+    parser.add_argument("--seed", type=int, default=CorpusSpec.seed)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the median is kept")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--only", nargs="+", metavar="PREFIX", help="Only run cases starting with these prefixes")
+    parser.add_argument("--backend-tasks", type=int, default=30)
+    parser.add_argument("--backend-work-seconds", type=float, default=0.0)
+    parser.add_argument("--skip-backend", action="store_true")
+    parser.add_argument("--out", default=RESULTS_DIR, help="Directory for the JSON result")
+    parser.add_argument("--compare", metavar="BASELINE_JSON", help="Fail if slower than this run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    spec = CorpusSpec(pages=args.pages, lines_per_page=args.lines, images_per_page=args.images,
+                      hit_frequency=args.hit_frequency, seed=args.seed)
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="pdf_bench_")
+    try:
+        # 1. Corpus
+        start = time.perf_counter()
+        paths = generate_corpus(os.path.join(workdir, "corpus"), args.files, spec)
+        print(f"Corpus: {args.files} files x {args.pages} pages in {time.perf_counter() - start:.2f}s")
+
+        # 2. PDF operations
+        cases, setups = pdf_cases(paths, spec, workdir, args.workers)
+        for name, func in cases.items():
+            if args.only and not name.startswith(tuple(args.only)):
+                continue
+            seconds = median_time(func, args.repeat, setups.get(name))
+            results[name] = {"seconds": round(seconds, 5)}
+            print(f"{name:>20}: {seconds * 1000:9.1f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # 3. Task backend
+    backend = None
+    if not args.skip_backend and (not args.only or "backend.end_to_end".startswith(tuple(args.only))):
+        backend = run_backend(args.backend_tasks, args.backend_work_seconds)
+        results["backend.end_to_end"] = {"seconds": backend["total_seconds"]}
+        print(f"{'backend.end_to_end':>20}: {backend['total_seconds'] * 1000:9.1f} ms "
+              f"({backend['tasks_per_sec']} tasks/s, p50 latency {backend['latency_p50']}s)")
+
+    # 4. Store
+    record = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "platform": {
+            "python": platform.python_version(),
+            "system": platform.platform(),
+            "cpus": os.cpu_count(),
+            "pymupdf": fitz.VersionBind,
+        },
+        "params": {**asdict(spec), "files": args.files, "repeat": args.repeat, "workers": args.workers},
+        "results": results,
+        "backend": backend,
+    }
+    os.makedirs(args.out, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    out_path = os.path.join(args.out, f"{stamp}_{record['commit']}.json")
+    with open(out_path, "w") as f:
+        json.dump(record, f, indent=2)
+    print(f"Results written to {out_path}")
+
+    # 5. Regression check
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("params") != record["params"]:
+            print("Warning: baseline was run with different parameters")
+        rows, regressions = compare(record, baseline, args.threshold, args.min_delta_ms / 1000)
+        print(f"\nAgainst {baseline.get('commit', '?')}:")
+        print(f"{'case':>20} {'baseline ms':>12} {'current ms':>11} {'change':>8}")
+        for name, before, current, ratio in rows:
+            flag = "  REGRESSION" if name in regressions else ""
+            print(f"{name:>20} {before * 1000:>12.1f} {current * 1000:>11.1f} {ratio - 1:>+8.0%}{flag}")
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the {args.threshold:.0%} threshold")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
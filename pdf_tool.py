@@ -1,14 +1,34 @@
 import streamlit as st
-from pypdf import PdfReader, PdfWriter
 import io
+import os
+import tempfile
+from pdfcore.merge import merge_pdfs, merge_uploads_to_file
+from pdfcore.page_ranges import parse_page_ranges
+from pdfcore.rotate import rotate_incremental
+from pdfcore.extract import extract_text
+from pdfcore.optimize import format_savings, optimize_bytes, optimize_file
+from pdfcore.source import DocumentSource
+from pdfcore.split import groups_by_bookmark, groups_every, groups_from_ranges, split_to_zip
 
 st.set_page_config(page_title="PDF Tools", page_icon="📄", layout="wide")
 
 st.title("📄 PDF Tools")
-st.markdown("A simple tool to Merge, Rotate, and Extract Text from PDFs.")
+st.markdown("A simple tool to Merge, Rotate, Split, and Extract Text from PDFs.")
+
+def load_source(uploaded_file, uploader_key):
+    """
+    One shared DocumentSource per uploader, reused across reruns until a
+    different file is uploaded.
+    """
+    sources = st.session_state.setdefault("sources", {})
+    file_id, source = sources.get(uploader_key, (None, None))
+    if source is None or file_id != uploaded_file.file_id:
+        source = DocumentSource.from_fileobj(uploaded_file)
+        sources[uploader_key] = (uploaded_file.file_id, source)
+    return source
 
 # Tabs for different functionalities
-tab1, tab2, tab3 = st.tabs(["🔀 Merge PDFs", "🔄 Rotate Pages", "📝 Extract Text"])
+tab1, tab2, tab3, tab4 = st.tabs(["🔀 Merge PDFs", "🔄 Rotate Pages", "📝 Extract Text", "✂️ Split PDF"])
 
 # --- Tab 1: Merge PDFs ---
 with tab1:
@@ -16,29 +36,58 @@ with tab1:
     uploaded_files = st.file_uploader("Upload PDFs to merge", type="pdf", accept_multiple_files=True, key="merge_upload")
     
     if uploaded_files:
-        st.write(f"Selected {len(uploaded_files)} files.")
+        total_mb = sum(f.size for f in uploaded_files) / (1024 * 1024)
+        st.write(f"Selected {len(uploaded_files)} files ({total_mb:.1f} MB).")
+        low_memory = st.checkbox(
+            "Low-memory merge (spool to disk)",
+            value=total_mb > 100,
+            help="Writes inputs and output to temporary files so memory use does not grow with the batch size."
+        )
+        # Optimizing loads the whole merged document, which defeats the low-memory merge
+        optimize_merged = st.checkbox(
+            "Optimize output (merge duplicate fonts/images, compress)",
+            value=not low_memory,
+            help="Loads the whole merged document into memory."
+        )
         
         if st.button("Merge PDFs"):
             if len(uploaded_files) < 2:
                 st.warning("Please upload at least 2 PDF files to merge.")
             else:
                 try:
-                    merger = PdfWriter()
-                    for pdf in uploaded_files:
-                        merger.append(pdf)
-                    
-                    output_buffer = io.BytesIO()
-                    merger.write(output_buffer)
-                    merger.close()
-                    
-                    st.success("PDFs merged successfully!")
-                    
-                    st.download_button(
-                        label="Download Merged PDF",
-                        data=output_buffer.getvalue(),
-                        file_name="merged_document.pdf",
-                        mime="application/pdf"
-                    )
+                    if low_memory:
+                        with tempfile.TemporaryDirectory(prefix="pdf_tool_") as work_dir:
+                            output_path = os.path.join(work_dir, "merged_document.pdf")
+                            merge_uploads_to_file(uploaded_files, output_path)
+                            
+                            st.success("PDFs merged successfully!")
+                            if optimize_merged:
+                                before, after = optimize_file(output_path)
+                                st.caption(f"Output optimized: {format_savings(before, after)}")
+                            
+                            with open(output_path, "rb") as merged_file:
+                                st.download_button(
+                                    label="Download Merged PDF",
+                                    data=merged_file,
+                                    file_name="merged_document.pdf",
+                                    mime="application/pdf"
+                                )
+                    else:
+                        output_buffer = io.BytesIO()
+                        merge_pdfs(uploaded_files, output_buffer)
+                        merged_bytes = output_buffer.getvalue()
+                        
+                        st.success("PDFs merged successfully!")
+                        if optimize_merged:
+                            merged_bytes, before, after = optimize_bytes(merged_bytes)
+                            st.caption(f"Output optimized: {format_savings(before, after)}")
+                        
+                        st.download_button(
+                            label="Download Merged PDF",
+                            data=merged_bytes,
+                            file_name="merged_document.pdf",
+                            mime="application/pdf"
+                        )
                 except Exception as e:
                     st.error(f"An error occurred: {e}")
 
@@ -49,8 +98,8 @@ with tab2:
     
     if uploaded_rotate_file:
         try:
-            reader = PdfReader(uploaded_rotate_file)
-            num_pages = len(reader.pages)
+            rotate_source = load_source(uploaded_rotate_file, "rotate_upload")
+            num_pages = len(rotate_source.open_pypdf().pages)
             st.info(f"This PDF has {num_pages} pages.")
             
             col1, col2 = st.columns(2)
@@ -61,36 +110,35 @@ with tab2:
             
             pages_to_rotate = []
             if page_selection == "Specific Pages":
-                page_input = st.text_input("Enter page numbers (comma separated, e.g., 1, 3, 5)", value="1")
+                page_input = st.text_input("Enter pages or ranges (e.g., 1-10, 15, 20-)", value="1")
                 try:
-                    # Convert 1-based user input to 0-based index
-                    pages_to_rotate = [int(x.strip()) - 1 for x in page_input.split(",") if x.strip().isdigit()]
-                except:
-                    st.error("Invalid page number format.")
+                    # Convert 1-based ranges to 0-based indices
+                    pages_to_rotate = parse_page_ranges(page_input, num_pages)
+                except ValueError as e:
+                    st.error(f"Invalid page selection: {e}")
             else:
                 pages_to_rotate = list(range(num_pages))
                 
-            if st.button("Rotate PDF"):
-                writer = PdfWriter()
-                
-                for i in range(num_pages):
-                    page = reader.pages[i]
-                    if i in pages_to_rotate:
-                        page.rotate(rotation_angle)
-                    writer.add_page(page)
-                
-                output_buffer = io.BytesIO()
-                writer.write(output_buffer)
-                writer.close()
-                
-                st.success("PDF rotated successfully!")
-                
-                st.download_button(
-                    label="Download Rotated PDF",
-                    data=output_buffer.getvalue(),
-                    file_name="rotated_document.pdf",
-                    mime="application/pdf"
-                )
+            if st.button("Rotate PDF", disabled=not pages_to_rotate):
+                with tempfile.TemporaryDirectory(prefix="pdf_tool_") as work_dir:
+                    # Only the changed pages are appended to the original bytes
+                    rotate_path = rotate_source.write_to(os.path.join(work_dir, "rotate.pdf"))
+                    original_size = os.path.getsize(rotate_path)
+                    rotated, incremental = rotate_incremental(rotate_path, rotation_angle, pages_to_rotate)
+                    
+                    if incremental:
+                        appended_kb = (os.path.getsize(rotate_path) - original_size) / 1024
+                        st.success(f"Rotated {rotated} pages (incremental update, {appended_kb:.1f} KB appended).")
+                    else:
+                        st.success(f"Rotated {rotated} pages (file was rewritten because it could not be updated incrementally).")
+                    
+                    with open(rotate_path, "rb") as rotated_file:
+                        st.download_button(
+                            label="Download Rotated PDF",
+                            data=rotated_file,
+                            file_name="rotated_document.pdf",
+                            mime="application/pdf"
+                        )
                 
         except Exception as e:
             st.error(f"Error reading PDF: {e}")
@@ -102,16 +150,22 @@ with tab3:
     
     if uploaded_text_file:
         try:
-            reader = PdfReader(uploaded_text_file)
+            col1, col2 = st.columns(2)
+            with col1:
+                engine = st.selectbox("Extraction engine", ["PyMuPDF (fast)", "pypdf"])
+            with col2:
+                workers = st.number_input("Worker processes", min_value=1, max_value=64, value=1)
+            backend = "pymupdf" if engine.startswith("PyMuPDF") else "pypdf"
+            
+            text_source = load_source(uploaded_text_file, "text_upload")
+            reader = text_source.open_pypdf()
             num_pages = len(reader.pages)
             
             st.info(f"Extracting text from {num_pages} pages...")
             
-            full_text = ""
-            for i, page in enumerate(reader.pages):
-                text = page.extract_text()
-                if text:
-                    full_text += f"--- Page {i+1} ---\n{text}\n\n"
+            # Reuse the open reader when possible; otherwise hand over the shared buffer
+            source = reader if backend == "pypdf" and workers == 1 else text_source
+            full_text = extract_text(source, backend=backend, workers=int(workers))
             
             if full_text:
                 st.text_area("Extracted Text", full_text, height=400)
@@ -126,3 +180,51 @@ with tab3:
                 
         except Exception as e:
             st.error(f"Error extracting text: {e}")
+
+# --- Tab 4: Split PDF ---
+with tab4:
+    st.header("Split a PDF into Several Files")
+    uploaded_split_file = st.file_uploader("Upload a PDF to split", type="pdf", key="split_upload")
+    
+    if uploaded_split_file:
+        try:
+            # Parsed once; every output is cut from this one document
+            with load_source(uploaded_split_file, "split_upload").open_fitz() as src:
+                st.info(f"This PDF has {src.page_count} pages.")
+                
+                split_mode = st.radio("Split by:", ["Page ranges", "Every N pages", "Bookmarks"], horizontal=True)
+                groups = []
+                if split_mode == "Page ranges":
+                    range_input = st.text_input("One file per ';' separated part (e.g., 1-10; 11-20; 21-)", value="1-")
+                    try:
+                        groups = groups_from_ranges(range_input, src.page_count)
+                    except ValueError as e:
+                        st.error(f"Invalid page ranges: {e}")
+                elif split_mode == "Every N pages":
+                    every = st.number_input("Pages per file", min_value=1, max_value=max(1, src.page_count), value=1)
+                    groups = groups_every(src.page_count, int(every))
+                else:
+                    level = st.number_input("Bookmark level", min_value=1, max_value=9, value=1)
+                    try:
+                        groups = groups_by_bookmark(src, int(level))
+                    except ValueError as e:
+                        st.error(str(e))
+                
+                if groups:
+                    st.write(f"Will create {len(groups)} files.")
+                
+                if st.button("Split PDF", disabled=not groups):
+                    output_buffer = io.BytesIO()
+                    stem = os.path.splitext(uploaded_split_file.name)[0]
+                    count = split_to_zip(src, groups, output_buffer, prefix=f"{stem}_")
+                
+                    st.success(f"Created {count} files!")
+                
+                    st.download_button(
+                        label="Download Split Files (.zip)",
+                        data=output_buffer.getvalue(),
+                        file_name=f"{stem}_split.zip",
+                        mime="application/zip"
+                    )
+        except Exception as e:
+            st.error(f"Error splitting PDF: {e}")
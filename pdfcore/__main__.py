@@ -0,0 +1,5 @@
+import sys
+
+from pdfcore.cli import main
+
+sys.exit(main())
@@ -0,0 +1,159 @@
+import csv
+import re
+from collections import namedtuple
+
+import fitz  # PyMuPDF
+
+DATE_RE = re.compile(r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}')
+AMOUNT_RE = re.compile(r'\(?-?\$?\s?\d{1,3}(?:,\d{3})*\.\d{2}\)?-?')
+
+# page is 1-based; bbox is (x0, y0, x1, y1) of the whole row
+Transaction = namedtuple("Transaction", ["page", "date", "amount", "description", "bbox"])
+
+FIELDS = ["page", "date", "amount", "description", "x0", "y0", "x1", "y1"]
+
+
+def iter_pages(doc):
+    """
+    Yields (page_number, page) one page at a time, so only the current page
+    is held in memory however long the document is.
+    """
+    for pno in range(doc.page_count):
+        yield pno, doc.load_page(pno)
+
+
+def iter_lines(page, tolerance=0.5):
+    """
+    Groups the page's words into visual lines. Words whose vertical centres
+    are within tolerance * word height belong to the same line, which keeps
+    table cells from different text blocks on one row.
+    Yields lists of word tuples sorted left to right.
+    """
+    words = sorted(page.get_text("words"), key=lambda w: ((w[1] + w[3]) / 2, w[0]))
+    line = []
+    line_mid = None
+    for word in words:
+        mid = (word[1] + word[3]) / 2
+        if line and abs(mid - line_mid) > (word[3] - word[1]) * tolerance:
+            yield sorted(line, key=lambda w: w[0])
+            line = []
+        if not line:
+            line_mid = mid
+        line.append(word)
+    if line:
+        yield sorted(line, key=lambda w: w[0])
+
+
+def parse_amount(text):
+    """
+    "$1,200.00" -> 1200.0; "(12.50)" and "12.50-" are negative.
+    """
+    cleaned = text.strip()
+    negative = cleaned.startswith("(") or cleaned.startswith("-") or cleaned.endswith("-")
+    value = float(re.sub(r'[^\d.]', '', cleaned))
+    return -value if negative else value
+
+
+def iter_transactions(doc):
+    """
+    Streams Transaction rows from every page: a row is a line holding a
+    date and at least one amount. The first amount after the date is taken
+    as the transaction amount; the rest of the line is the description.
+    """
+    for pno, page in iter_pages(doc):
+        for words in iter_lines(page):
+            text = " ".join(w[4] for w in words)
+            date = DATE_RE.search(text)
+            if not date:
+                continue
+            amount = AMOUNT_RE.search(text, date.end()) or AMOUNT_RE.search(text)
+            if not amount:
+                continue
+            description = " ".join(
+                AMOUNT_RE.sub(" ", text[:date.start()] + " " + text[date.end():]).split()
+            )
+            bbox = (
+                min(w[0] for w in words),
+                min(w[1] for w in words),
+                max(w[2] for w in words),
+                max(w[3] for w in words),
+            )
+            yield Transaction(pno + 1, date.group(), parse_amount(amount.group()), description, bbox)
+
+
+def analyze_pdf(pdf_bytes):
+    """
+    Opens pdf_bytes and streams its transactions. The document stays open
+    for as long as the generator is being consumed.
+    """
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        yield from iter_transactions(doc)
+    finally:
+        doc.close()
+
+
+def as_record(row):
+    """
+    Flattens a Transaction into a dict keyed by FIELDS.
+    """
+    x0, y0, x1, y1 = row.bbox
+    return {
+        "page": row.page,
+        "date": row.date,
+        "amount": row.amount,
+        "description": row.description,
+        "x0": round(x0, 2),
+        "y0": round(y0, 2),
+        "x1": round(x1, 2),
+        "y1": round(y1, 2),
+    }
+
+
+def write_csv(rows, fileobj):
+    """
+    Streams rows to a text file object as CSV. Returns the row count.
+    """
+    writer = csv.DictWriter(fileobj, fieldnames=FIELDS)
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(as_record(row))
+        count += 1
+    return count
+
+
+def write_parquet(rows, where, batch_size=5000):
+    """
+    Streams rows to a Parquet file in record batches of batch_size rows.
+    Requires pyarrow. Returns the row count.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        ("page", pa.int32()),
+        ("date", pa.string()),
+        ("amount", pa.float64()),
+        ("description", pa.string()),
+        ("x0", pa.float32()),
+        ("y0", pa.float32()),
+        ("x1", pa.float32()),
+        ("y1", pa.float32()),
+    ])
+    count = 0
+    batch = []
+    with pq.ParquetWriter(where, schema) as writer:
+        for row in rows:
+            batch.append(as_record(row))
+            if len(batch) >= batch_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
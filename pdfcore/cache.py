@@ -0,0 +1,169 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from pdfcore.source import DocumentSource
+
+# Limits for the process-wide cache; a Streamlit server shares one cache
+# across all sessions, so these bound its total footprint.
+DEFAULT_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_MB", "512")) * 1024 * 1024
+DEFAULT_MAX_ENTRIES = int(os.getenv("PDF_CACHE_MAX_ENTRIES", "16"))
+
+
+def content_hash(data):
+    """
+    Cache key for a PDF: SHA-256 of its bytes.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+class CachedDocument:
+    """
+    One parsed PDF plus everything derived from it (page text, indexes).
+
+    The fitz document is opened once over the source buffer and shared, so
+    callers that touch it must hold `lock`; the helpers below do that
+    themselves. `data` is a read-only memoryview of that same buffer.
+    """
+
+    def __init__(self, key, source):
+        if not isinstance(source, DocumentSource):
+            source = DocumentSource.from_bytes(source)
+        self.key = key
+        self.source = source
+        self.data = source.view
+        self.lock = threading.RLock()
+        self.nbytes = source.nbytes
+        self._doc = source.open_fitz()
+        self.page_count = self._doc.page_count
+        self._page_text = {}
+        self._indexes = {}
+        self._on_grow = None
+
+    @property
+    def doc(self):
+        return self._doc
+
+    def _grew(self, size):
+        self.nbytes += size
+        if self._on_grow:
+            self._on_grow()
+
+    def page_text(self, pno):
+        """
+        Plain text of page pno, extracted once.
+        """
+        with self.lock:
+            text = self._page_text.get(pno)
+            if text is None:
+                text = self._doc[pno].get_text()
+                self._page_text[pno] = text
+                self._grew(len(text))
+            return text
+
+    def get_index(self, name, builder):
+        """
+        Returns the index stored under name, building it with builder(self)
+        on first use. Indexes may expose an `nbytes` estimate for eviction.
+        """
+        with self.lock:
+            index = self._indexes.get(name)
+            if index is None:
+                index = builder(self)
+                self._indexes[name] = index
+                self._grew(getattr(index, "nbytes", 0))
+            return index
+
+
+class DocumentCache:
+    """
+    LRU cache of CachedDocument keyed by content hash, evicting the least
+    recently used entries once max_bytes or max_entries is exceeded.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return entry
+
+    def get_or_load(self, data, key=None):
+        """
+        Returns the cached document for data (PDF bytes or a DocumentSource),
+        parsing it on a miss. Pass key when the content hash is already known
+        to skip hashing.
+        """
+        if not isinstance(data, DocumentSource):
+            data = DocumentSource.from_bytes(data)
+        key = key or content_hash(data.view)
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+
+        # Parse outside the cache lock so other sessions are not blocked
+        entry = CachedDocument(key, data)
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                self._entries.move_to_end(key)
+                return existing
+            self.misses += 1
+            entry._on_grow = self._evict
+            self._entries[key] = entry
+        self._evict()
+        return entry
+
+    @property
+    def nbytes(self):
+        return sum(entry.nbytes for entry in list(self._entries.values()))
+
+    def _evict(self):
+        with self._lock:
+            # Never evict the most recent entry, even if it alone is too big
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries
+                or sum(e.nbytes for e in self._entries.values()) > self.max_bytes
+            ):
+                # Entries may still be in use by another session, so they are
+                # dropped rather than closed; the document closes once unused.
+                _, entry = self._entries.popitem(last=False)
+                entry._on_grow = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(e.nbytes for e in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_document_cache = None
+_document_cache_lock = threading.Lock()
+
+
+def get_document_cache():
+    """
+    Process-wide document cache shared by every session.
+    """
+    global _document_cache
+    with _document_cache_lock:
+        if _document_cache is None:
+            _document_cache = DocumentCache()
+        return _document_cache
@@ -0,0 +1,269 @@
+"""
+Headless batch processing for directories or manifests of PDFs.
+
+    python -m pdfcore replace --find ACME --replace Globex statements/ -o out/
+    python -m pdfcore analyze --manifest files.txt -o out/ --workers 16
+    python -m pdfcore split --every 10 scans/ -o parts/
+    python -m pdfcore merge a.pdf b.pdf -o merged.pdf
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fitz  # PyMuPDF
+
+from pdfcore.analyzer import analyze_pdf, write_csv, write_parquet
+from pdfcore.extract import BACKENDS, DEFAULT_BACKEND, extract_text
+from pdfcore.merge import merge_pdfs, merge_to_file
+from pdfcore.optimize import format_savings, optimize_bytes, optimize_file
+from pdfcore.replace import replace_in_pdf
+from pdfcore.rotate import rotate_incremental
+from pdfcore.source import DocumentSource
+from pdfcore.split import groups_by_bookmark, groups_every, groups_from_ranges, split_to_dir
+
+# Output file extension per per-file operation
+OUTPUT_SUFFIX = {
+    "replace": ".pdf",
+    "rotate": ".pdf",
+    "extract": ".txt",
+    "analyze": ".csv",
+    "split": "",  # a directory of parts per input
+}
+
+
+def collect_inputs(paths, manifest=None, recursive=False):
+    """
+    Expands files, directories (*.pdf, sorted) and an optional manifest file
+    (one path per line, '#' comments) into a de-duplicated path list. The
+    order of files given explicitly is kept, since it matters for merge.
+    """
+    found = []
+    if manifest:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    found.append(line if os.path.isabs(line) else os.path.join(base, line))
+    for path in paths:
+        if os.path.isdir(path):
+            if recursive:
+                found.extend(sorted(
+                    os.path.join(root, name)
+                    for root, _, files in os.walk(path)
+                    for name in files if name.lower().endswith(".pdf")
+                ))
+            else:
+                found.extend(sorted(
+                    os.path.join(path, name) for name in os.listdir(path)
+                    if name.lower().endswith(".pdf") and os.path.isfile(os.path.join(path, name))
+                ))
+        else:
+            found.append(path)
+    return list(dict.fromkeys(os.path.abspath(p) for p in found))
+
+
+def output_path(path, root, out_dir, suffix):
+    """
+    Mirrors path's location under root into out_dir with a new suffix.
+    """
+    relative = os.path.relpath(path, root) if root else os.path.basename(path)
+    return os.path.join(out_dir, os.path.splitext(relative)[0] + suffix)
+
+
+def process_file(operation, path, out_path, options):
+    """
+    Runs one operation on one file. Returns a short result description;
+    raises on failure (the caller records the error and moves on).
+    """
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+
+    if operation == "replace":
+        # Inputs are memory-mapped rather than read into memory
+        source = DocumentSource.from_path(path)
+        data, count = replace_in_pdf(source.view, options["find"], options["replace"], match_case=options["match_case"])
+        if data is None:
+            return "0 replacements"
+        message = f"{count} replacements"
+        if options["optimize"]:
+            data, before, after = optimize_bytes(data)
+            message += f", {format_savings(before, after)}"
+        with open(out_path, "wb") as f:
+            f.write(data)
+        return message
+
+    if operation == "rotate":
+        rotated, incremental = rotate_incremental(path, options["angle"], options["pages"], out_path)
+        return f"{rotated} pages rotated ({'incremental' if incremental else 'rewritten'})"
+
+    if operation == "extract":
+        text = extract_text(DocumentSource.from_path(path), backend=options["backend"])
+        with open(out_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return f"{len(text)} characters"
+
+    if operation == "analyze":
+        rows = analyze_pdf(DocumentSource.from_path(path).view)
+        if options["format"] == "parquet":
+            count = write_parquet(rows, out_path)
+        else:
+            with open(out_path, "w", newline="", encoding="utf-8") as f:
+                count = write_csv(rows, f)
+        return f"{count} rows"
+
+    if operation == "split":
+        with fitz.open(path) as src:
+            if options["every"]:
+                groups = groups_every(src.page_count, options["every"])
+            elif options["ranges"]:
+                groups = groups_from_ranges(options["ranges"], src.page_count)
+            else:
+                groups = groups_by_bookmark(src, options["bookmark_level"])
+            written = split_to_dir(src, groups, out_path)
+        return f"{len(written)} files"
+
+    raise ValueError(f"Unknown operation: {operation}")
+
+
+def _run_job(operation, path, out_path, options):
+    # Per-file error isolation: failures come back as results, not exceptions
+    start = time.perf_counter()
+    try:
+        message = process_file(operation, path, out_path, options)
+        return path, True, message, time.perf_counter() - start
+    except Exception as e:
+        # Don't leave a half-written output behind
+        if os.path.isdir(out_path):
+            shutil.rmtree(out_path)
+        elif os.path.exists(out_path):
+            os.remove(out_path)
+        return path, False, f"{type(e).__name__}: {e}", time.perf_counter() - start
+
+
+def run_batch(operation, inputs, out_dir, options, workers=1, root=None, report=None):
+    """
+    Processes inputs with a pool of worker processes (in-process when
+    workers == 1). report(done, total, path, ok, message, seconds) is called
+    as each file finishes. Returns (succeeded, failed, elapsed_seconds).
+    """
+    suffix = OUTPUT_SUFFIX[operation]
+    if operation == "analyze" and options.get("format") == "parquet":
+        suffix = ".parquet"
+    jobs = [(path, output_path(path, root, out_dir, suffix)) for path in inputs]
+    succeeded = failed = 0
+    start = time.perf_counter()
+
+    def record(result):
+        nonlocal succeeded, failed
+        path, ok, message, seconds = result
+        if ok:
+            succeeded += 1
+        else:
+            failed += 1
+        if report:
+            report(succeeded + failed, len(jobs), path, ok, message, seconds)
+
+    if workers <= 1:
+        for path, out_path in jobs:
+            record(_run_job(operation, path, out_path, options))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_run_job, operation, path, out_path, options): path
+                for path, out_path in jobs
+            }
+            for future in as_completed(futures):
+                try:
+                    record(future.result())
+                except Exception as e:
+                    # A worker died (e.g. a crash inside MuPDF); only this file fails
+                    record((futures[future], False, f"{type(e).__name__}: {e}", 0.0))
+
+    return succeeded, failed, time.perf_counter() - start
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m pdfcore", description="Batch PDF processing.")
+    sub = parser.add_subparsers(dest="operation", required=True)
+
+    def add_common(p, per_file=True):
+        p.add_argument("inputs", nargs="*", help="PDF files and/or directories")
+        p.add_argument("--manifest", help="Text file listing one PDF path per line")
+        p.add_argument("-r", "--recursive", action="store_true", help="Search directories recursively")
+        p.add_argument("-q", "--quiet", action="store_true", help="Only print the summary")
+        if per_file:
+            p.add_argument("-o", "--out-dir", required=True, help="Directory for output files")
+            p.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+
+    p = sub.add_parser("replace", help="Find and replace text")
+    add_common(p)
+    p.add_argument("--find", required=True)
+    p.add_argument("--replace", default="")
+    p.add_argument("--match-case", action="store_true")
+    p.add_argument("--optimize", action="store_true", help="Optimize output size")
+
+    p = sub.add_parser("rotate", help="Rotate pages")
+    add_common(p)
+    p.add_argument("--angle", type=int, choices=[90, 180, 270], default=90)
+    p.add_argument("--pages", help='Page ranges such as "1-10, 15, 20-" (default: all)')
+
+    p = sub.add_parser("extract", help="Extract text to .txt")
+    add_common(p)
+    p.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND, help="Text extraction engine")
+
+    p = sub.add_parser("analyze", help="Extract transaction rows to CSV/Parquet")
+    add_common(p)
+    p.add_argument("--format", choices=["csv", "parquet"], default="csv")
+
+    p = sub.add_parser("split", help="Split each input into several PDFs")
+    add_common(p)
+    mode = p.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--ranges", help='One output per ";" part, e.g. "1-10; 11-20; 21-"')
+    mode.add_argument("--every", type=int, help="One output per N pages")
+    mode.add_argument("--bookmarks", action="store_true", help="One output per bookmark")
+    p.add_argument("--bookmark-level", type=int, default=1)
+
+    p = sub.add_parser("merge", help="Merge all inputs into one PDF")
+    add_common(p, per_file=False)
+    p.add_argument("-o", "--output", required=True, help="Merged PDF path")
+    p.add_argument("--low-memory", action="store_true", help="Merge with incremental saves to disk (bounded memory)")
+    p.add_argument("--optimize", action="store_true", help="Deduplicate objects and compress the merged output")
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    inputs = collect_inputs(args.inputs, args.manifest, args.recursive)
+    if not inputs:
+        print("No input PDFs found.", file=sys.stderr)
+        return 2
+
+    if args.operation == "merge":
+        start = time.perf_counter()
+        merge = merge_to_file if args.low_memory else merge_pdfs
+        pages = merge(inputs, args.output)
+        print(f"Merged {len(inputs)} files ({pages} pages) into {args.output} in {time.perf_counter() - start:.1f}s")
+        if args.optimize:
+            print(f"Optimized: {format_savings(*optimize_file(args.output))}")
+        return 0
+
+    options = {k: v for k, v in vars(args).items() if k not in ("inputs", "manifest", "recursive", "quiet", "out_dir", "workers")}
+    dirs = [os.path.dirname(p) for p in inputs]
+    root = os.path.commonpath(dirs) if dirs else None
+
+    def report(done, total, path, ok, message, seconds):
+        if not args.quiet or not ok:
+            status = "ok  " if ok else "FAIL"
+            print(f"[{done}/{total}] {status} {os.path.relpath(path, root)} ({seconds:.2f}s) {message}", file=sys.stderr)
+
+    succeeded, failed, elapsed = run_batch(
+        args.operation, inputs, args.out_dir, options,
+        workers=max(1, args.workers), root=root, report=report,
+    )
+    rate = (succeeded + failed) / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"{succeeded} succeeded, {failed} failed in {elapsed:.1f}s ({rate:.1f} files/min)")
+    return 1 if failed else 0
@@ -0,0 +1,103 @@
+import json
+import re
+
+import openai
+
+from pdfcore.llm_cache import cache_key, get_response_cache
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+SYSTEM_PROMPT = (
+    "You are a command parser. Extract the 'find' text and 'replace' text from the user's edit instruction. "
+    "Return ONLY a JSON object: {\"find\": \"...\", \"replace\": \"...\"}. "
+    "If the user says 'delete X', replace should be empty string. "
+    "Example: 'Change 2023 to 2024' -> {\"find\": \"2023\", \"replace\": \"2024\"}"
+)
+
+QUOTED = r"""(?:'(?P<{0}1>[^']+)'|"(?P<{0}2>[^"]+)"|(?P<{0}3>.+?))"""
+REPLACE_RE = re.compile(
+    r"^\s*(?:replace|change|swap|substitute|update)\s+" + QUOTED.format("find")
+    + r"\s+(?:with|to|into|by|for)\s+" + QUOTED.format("repl") + r"\s*[.!]?\s*$",
+    re.IGNORECASE,
+)
+DELETE_RE = re.compile(
+    r"^\s*(?:delete|remove|erase)\s+" + QUOTED.format("find") + r"\s*[.!]?\s*$",
+    re.IGNORECASE,
+)
+SEPARATOR_RE = re.compile(r"\s(?:with|to|into|by|for)\s", re.IGNORECASE)
+# An unquoted part is only taken literally when it is a single token: in
+# "Change 2023 to 2024 everywhere" the trailing qualifier is not part of it
+TOKEN_RE = re.compile(r"""[^\s'"]+""")
+
+
+def _group(match, name):
+    for i in (1, 2, 3):
+        value = match.group(f"{name}{i}")
+        if value is not None:
+            return value, i < 3
+    return None, False
+
+
+def _literal(value, quoted):
+    return quoted or TOKEN_RE.fullmatch(value) is not None
+
+
+def parse_simple_command(command_text):
+    """
+    Local fast path for unambiguous commands such as "Change 2023 to 2024",
+    "Replace 'Invoice #001' with 'Invoice #999'" or "Delete DRAFT": every
+    part is quoted or a single token, and nothing follows the last one.
+    Returns (find, replace) or None when the command needs the model - e.g.
+    "Change the date to 2025", where the text to find has to be inferred,
+    or "Change Jan 1 to Feb 1 in the header".
+    """
+    match = DELETE_RE.match(command_text)
+    if match:
+        find, quoted = _group(match, "find")
+        return (find, "") if _literal(find, quoted) else None
+
+    match = REPLACE_RE.match(command_text)
+    if not match:
+        return None
+    find, find_quoted = _group(match, "find")
+    replace, replace_quoted = _group(match, "repl")
+    if not (_literal(find, find_quoted) and _literal(replace, replace_quoted)):
+        return None
+    if not (find_quoted and replace_quoted) and len(SEPARATOR_RE.findall(command_text)) != 1:
+        return None
+    return find, replace
+
+
+def parse_edit_command(command_text, model=DEFAULT_MODEL, cache=None):
+    """
+    Extracts 'find_text' and 'replace_text' from a natural language command.
+
+    Simple commands are parsed locally; everything else goes to the model,
+    with responses cached by model + normalized prompt.
+    Returns (find, replace, error).
+    """
+    simple = parse_simple_command(command_text)
+    if simple:
+        return simple[0], simple[1], None
+
+    if not openai.api_key:
+        return None, None, "OpenAI API Key required for smart parsing."
+
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": command_text},
+    ]
+    cache = cache or get_response_cache()
+    key = cache_key(model, messages)
+    try:
+        content = cache.get(key)
+        if content is None:
+            response = openai.chat.completions.create(model=model, messages=messages)
+            content = response.choices[0].message.content
+            result = json.loads(content)
+            cache.put(key, model, content)
+        else:
+            result = json.loads(content)
+        return result.get("find"), result.get("replace"), None
+    except Exception as e:
+        return None, None, str(e)
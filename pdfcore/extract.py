@@ -0,0 +1,123 @@
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+from pypdf import PdfReader
+
+from pdfcore.parallel import page_shards
+from pdfcore.source import BufferReader, DocumentSource
+
+BACKENDS = ("pymupdf", "pypdf")
+DEFAULT_BACKEND = "pypdf"
+
+# Set once per worker process by _init_worker
+_worker_source = None
+
+
+def _open(source, backend):
+    # source: path, PDF bytes or memoryview, DocumentSource, binary file
+    # object, or a PdfReader (pypdf only)
+    if isinstance(source, DocumentSource):
+        return source.open_fitz() if backend == "pymupdf" else source.open_pypdf()
+    if backend == "pymupdf":
+        if isinstance(source, str):
+            return fitz.open(source)
+        if hasattr(source, "read"):
+            source.seek(0)
+            source = source.read()
+        return fitz.open(stream=source, filetype="pdf")
+    if backend == "pypdf":
+        if isinstance(source, PdfReader):
+            return source
+        if isinstance(source, (str, io.IOBase)) or hasattr(source, "read"):
+            return PdfReader(source)
+        return PdfReader(BufferReader(memoryview(source)))
+    raise ValueError(f"Unknown extraction backend: {backend}")
+
+
+def _page_count(doc, backend):
+    return doc.page_count if backend == "pymupdf" else len(doc.pages)
+
+
+def _page_text(doc, backend, pno):
+    if backend == "pymupdf":
+        return doc.load_page(pno).get_text()
+    return doc.pages[pno].extract_text()
+
+
+def _picklable(source):
+    # Workers get the file path when there is one, otherwise their own copy
+    if isinstance(source, DocumentSource):
+        return source.path or bytes(source.view)
+    if isinstance(source, memoryview):
+        return bytes(source)
+    return source
+
+
+def _init_worker(source):
+    global _worker_source
+    _worker_source = source
+
+
+def _extract_range(backend, start, stop):
+    doc = _open(_worker_source, backend)
+    return [_page_text(doc, backend, pno) for pno in range(start, stop)]
+
+
+def iter_page_texts(source, backend=DEFAULT_BACKEND, workers=1, shards_per_worker=4):
+    """
+    Yields (page_number, text) in page order.
+
+    With workers > 1 the pages are split into contiguous ranges and
+    extracted in a process pool; each worker opens the source itself
+    (source must then be a path, bytes or a DocumentSource).
+    """
+    doc = _open(source, backend)
+    try:
+        page_count = _page_count(doc, backend)
+        if workers <= 1 or page_count < 2:
+            for pno in range(page_count):
+                yield pno, _page_text(doc, backend, pno)
+            return
+    finally:
+        # _open always creates a fitz document; a PdfReader may be the
+        # caller's own (or read the caller's file object), so it stays open
+        if backend == "pymupdf":
+            doc.close()
+
+    shards = page_shards(page_count, workers * shards_per_worker)
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(shards)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(_picklable(source),),
+    ) as pool:
+        starts = [start for start, _ in shards]
+        stops = [stop for _, stop in shards]
+        # map() hands results back in shard order as they complete
+        for start, texts in zip(starts, pool.map(_extract_range, [backend] * len(shards), starts, stops)):
+            for offset, text in enumerate(texts):
+                yield start + offset, text
+
+
+def write_text(source, out, backend=DEFAULT_BACKEND, workers=1):
+    """
+    Streams the text of every page to the text file object out, each page
+    under a "--- Page N ---" header. Returns the number of characters written.
+    """
+    written = 0
+    for pno, text in iter_page_texts(source, backend=backend, workers=workers):
+        if text:
+            written += out.write(f"--- Page {pno+1} ---\n{text}\n\n")
+    return written
+
+
+def extract_text(source, backend=DEFAULT_BACKEND, workers=1):
+    """
+    Extracts the text of every page, each page under a "--- Page N ---"
+    header. Returns "" when the PDF has no text layer.
+    """
+    out = io.StringIO()
+    write_text(source, out, backend=backend, workers=workers)
+    return out.getvalue()
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.getenv(
+    "AI_RESPONSE_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "ai-pdf-master", "responses.db"),
+)
+DEFAULT_TTL_SECONDS = int(os.getenv("AI_RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("AI_RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+DEFAULT_MAX_BYTES = int(os.getenv("AI_RESPONSE_CACHE_MAX_MB", "64")) * 1024 * 1024
+
+
+def normalize_messages(messages):
+    """
+    Collapses whitespace in every message so trivially different prompts
+    share a cache entry. Case is kept: it matters for find/replace.
+    """
+    return [
+        {"role": m["role"], "content": " ".join(str(m["content"]).split())}
+        for m in messages
+    ]
+
+
+def cache_key(model, messages):
+    payload = json.dumps([model, normalize_messages(messages)], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent SQLite cache of model responses keyed by model + normalized
+    prompt hash, with a TTL and least-recently-used eviction by entry count
+    and total response size.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT,"
+            " response TEXT,"
+            " size INTEGER,"
+            " created_at REAL,"
+            " last_used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, model, response):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+        # Walk from least recently used until both limits hold again
+        drop = []
+        for key, entry_size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if count <= self.max_entries and size <= self.max_bytes:
+                break
+            drop.append((key,))
+            count -= 1
+            size -= entry_size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", drop)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"entries": count, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+
+class CachedChatClient:
+    """
+    Wraps an async chat client (see pdfcore.qa) so identical prompts are
+    answered from the response cache.
+    """
+
+    def __init__(self, client, cache):
+        self.client = client
+        self.cache = cache
+        self.model = getattr(client, "model", "")
+
+    async def complete(self, messages):
+        key = cache_key(self.model, messages)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = await self.client.complete(messages)
+        if response is not None:
+            self.cache.put(key, self.model, response)
+        return response
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Process-wide response cache at DEFAULT_PATH.
+    """
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+
+import fitz  # PyMuPDF
+from pypdf import PdfWriter
+
+SPOOL_CHUNK_BYTES = 1024 * 1024
+# Inputs appended between incremental saves in merge_to_file
+MERGE_BATCH = 10
+
+
+def merge_pdfs(sources, output):
+    """
+    Appends every source (path or binary file object) into one PDF written
+    to output (path or binary file object). Returns the page count.
+    """
+    merger = PdfWriter()
+    try:
+        for source in sources:
+            merger.append(source)
+        merger.write(output)
+        return len(merger.pages)
+    finally:
+        merger.close()
+
+
+def spool_to_disk(fileobjs, directory):
+    """
+    Copies file objects (e.g. uploads) to numbered temp files in directory,
+    SPOOL_CHUNK_BYTES at a time. Returns the file paths in input order.
+    """
+    paths = []
+    for i, fileobj in enumerate(fileobjs):
+        path = os.path.join(directory, f"input_{i:05d}.pdf")
+        fileobj.seek(0)
+        with open(path, "wb") as out:
+            shutil.copyfileobj(fileobj, out, SPOOL_CHUNK_BYTES)
+        paths.append(path)
+    return paths
+
+
+def merge_to_file(paths, output_path, batch_size=MERGE_BATCH):
+    """
+    Low-memory merge of PDF files on disk into output_path.
+
+    Inputs are opened from their paths, so MuPDF reads objects on demand
+    instead of loading whole files. The output is grown with incremental
+    saves every batch_size inputs and reopened in between, so finished
+    pages are flushed to disk. Peak memory depends on the batch, not on the
+    total input size. Returns the page count.
+    """
+    if not paths:
+        raise ValueError("Nothing to merge.")
+
+    # Seed the output with the first input via a full save
+    out = fitz.open()
+    with fitz.open(paths[0]) as src:
+        out.insert_pdf(src)
+    out.save(output_path)
+    out.close()
+
+    for start in range(1, len(paths), batch_size):
+        out = fitz.open(output_path)
+        try:
+            for path in paths[start:start + batch_size]:
+                with fitz.open(path) as src:
+                    out.insert_pdf(src)
+            out.saveIncr()
+        finally:
+            out.close()
+
+    with fitz.open(output_path) as merged:
+        return merged.page_count
+
+
+def merge_uploads_to_file(fileobjs, output_path, batch_size=MERGE_BATCH):
+    """
+    Spools file objects to a temporary directory, then merge_to_file().
+    """
+    with tempfile.TemporaryDirectory(prefix="pdf_merge_") as spool_dir:
+        paths = spool_to_disk(fileobjs, spool_dir)
+        return merge_to_file(paths, output_path, batch_size=batch_size)
+
@@ -0,0 +1,75 @@
+import os
+import shutil
+
+import fitz  # PyMuPDF
+
+# garbage=4 removes unreferenced objects, compacts the xref and merges
+# identical objects (e.g. the same font or image embedded by several merged
+# inputs); the rest recompresses streams and packs objects into object streams.
+SAVE_OPTIONS = {
+    "garbage": 4,
+    "deflate": True,
+    "deflate_images": True,
+    "deflate_fonts": True,
+    "clean": True,
+    "use_objstms": 1,
+}
+
+
+def optimize_document(doc, subset_fonts=False):
+    """
+    Returns the optimized bytes of an open document. subset_fonts also drops
+    unused glyphs from embedded fonts (smaller, but later edits may need them).
+    """
+    if subset_fonts:
+        doc.subset_fonts()
+    return doc.tobytes(**SAVE_OPTIONS)
+
+
+def optimize_bytes(data, subset_fonts=False):
+    """
+    Optimizes PDF bytes. Returns (output_bytes, size_before, size_after);
+    the input is returned unchanged when optimizing would not make it smaller.
+    """
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        optimized = optimize_document(doc, subset_fonts=subset_fonts)
+    if len(optimized) >= len(data):
+        return data, len(data), len(data)
+    return optimized, len(data), len(optimized)
+
+
+def optimize_file(path, output_path=None, subset_fonts=False):
+    """
+    Optimizes a PDF on disk, in place unless output_path is given.
+    Returns (size_before, size_after).
+    """
+    output_path = output_path or path
+    before = os.path.getsize(path)
+    tmp_path = output_path + ".optimized"
+    with fitz.open(path) as doc:
+        if subset_fonts:
+            doc.subset_fonts()
+        doc.save(tmp_path, **SAVE_OPTIONS)
+    after = os.path.getsize(tmp_path)
+    if after >= before:
+        os.remove(tmp_path)
+        if output_path != path:
+            shutil.copyfile(path, output_path)
+        return before, before
+    os.replace(tmp_path, output_path)
+    return before, after
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024 or unit == "MB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_savings(before, after):
+    """
+    "1.2 MB -> 812.4 KB (-34%)"
+    """
+    saved = (1 - after / before) * 100 if before else 0.0
+    return f"{format_size(before)} -> {format_size(after)} (-{saved:.0f}%)"
@@ -0,0 +1,34 @@
+import re
+
+RANGE_RE = re.compile(r'^(\d*)\s*-\s*(\d*)$')
+
+
+def parse_page_ranges(spec, page_count):
+    """
+    Parses a 1-based page-range spec into sorted, unique 0-based indices.
+
+    "1-10, 15, 20-" -> pages 1 to 10, 15, and 20 to the end; "-3" means
+    pages 1 to 3. Raises ValueError for malformed or out-of-range parts
+    instead of silently dropping them.
+    """
+    pages = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if part.isdigit():
+            start = stop = int(part)
+        else:
+            match = RANGE_RE.match(part)
+            if not match or not (match.group(1) or match.group(2)):
+                raise ValueError(f"Invalid page range: '{part}'")
+            start = int(match.group(1)) if match.group(1) else 1
+            stop = int(match.group(2)) if match.group(2) else page_count
+        if start > stop:
+            raise ValueError(f"Page range '{part}' ends before it starts")
+        if start < 1 or stop > page_count:
+            raise ValueError(f"Page range '{part}' is outside 1-{page_count}")
+        pages.update(range(start - 1, stop))
+    if not pages:
+        raise ValueError("No pages selected.")
+    return sorted(pages)
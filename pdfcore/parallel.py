@@ -0,0 +1,138 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+
+from pdfcore.replace import replace_in_document, replace_on_page
+
+# Below this page count the pool start-up costs more than it saves.
+MIN_PARALLEL_PAGES = 16
+
+# Links to a page of the same document
+INTERNAL_LINKS = (fitz.LINK_GOTO, fitz.LINK_NAMED)
+
+# Set once per worker process by _init_worker, so the PDF bytes are sent
+# to each worker a single time rather than once per shard.
+_worker_pdf = None
+
+
+def page_shards(page_count, shard_count):
+    """
+    Splits range(page_count) into at most shard_count contiguous
+    (start, stop) ranges of near-equal size.
+    """
+    if page_count <= 0:
+        return []
+    shard_count = max(1, min(shard_count, page_count))
+    size = math.ceil(page_count / shard_count)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def _init_worker(pdf_bytes):
+    global _worker_pdf
+    _worker_pdf = pdf_bytes
+
+
+def _replace_shard(start, stop, find_text, replace_text, match_case):
+    """
+    Runs in a worker: opens the PDF itself, edits pages [start, stop) and
+    returns (shard_bytes, count). shard_bytes is None when the shard had no
+    hits, so the parent can copy those pages straight from the source.
+    """
+    doc = fitz.open(stream=_worker_pdf, filetype="pdf")
+    try:
+        count = 0
+        for pno in range(start, stop):
+            count += replace_on_page(doc[pno], find_text, replace_text, match_case=match_case)
+        if count == 0:
+            return None, 0
+        doc.select(list(range(start, stop)))
+        return doc.tobytes(garbage=1), count
+    finally:
+        doc.close()
+
+
+def _restore_links(src, out):
+    """
+    insert_pdf() only keeps internal links whose target is among the pages
+    inserted with them, so links into another shard are lost. Pages keep
+    their numbers, so the source's internal links are re-inserted as they
+    are; named destinations become GoTo links to the page they resolve to,
+    since the output has no name tree.
+    """
+    for pno in range(src.page_count):
+        links = [link for link in src[pno].get_links() if link["kind"] in INTERNAL_LINKS]
+        if not links:
+            continue
+        page = out[pno]
+        for link in page.get_links():
+            if link["kind"] in INTERNAL_LINKS:
+                page.delete_link(link)
+        for link in links:
+            if link["kind"] == fitz.LINK_NAMED:
+                if link.get("page", -1) < 0:
+                    continue
+                link = {"kind": fitz.LINK_GOTO, "from": link["from"], "page": link["page"],
+                        "to": link.get("to", fitz.Point(0, 0)), "zoom": link.get("zoom", 0)}
+            page.insert_link(link)
+
+
+def replace_in_pdf_parallel(pdf_bytes, find_text, replace_text, match_case=False, workers=None, shards_per_worker=2):
+    """
+    Page-sharded version of pdfcore.replace.replace_in_pdf.
+
+    The document is split into contiguous page ranges that are edited in a
+    process pool, then stitched back together in page order. Pages carry
+    the same content and links as the serial path; document metadata, the
+    outline and links between pages of different shards are restored from
+    the source.
+    Returns (output_bytes, count); output_bytes is None when nothing matched.
+    """
+    workers = workers or os.cpu_count() or 1
+    src = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        if workers < 2 or src.page_count < MIN_PARALLEL_PAGES:
+            count = replace_in_document(src, find_text, replace_text, match_case=match_case)
+            return (src.tobytes(), count) if count else (None, 0)
+
+        shards = page_shards(src.page_count, workers * shards_per_worker)
+        # spawn keeps workers independent of the (threaded) parent process
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(shards)),
+            mp_context=context,
+            initializer=_init_worker,
+            # memoryviews (shared upload buffers) cannot be pickled
+            initargs=(bytes(pdf_bytes),),
+        ) as pool:
+            futures = [
+                pool.submit(_replace_shard, start, stop, find_text, replace_text, match_case)
+                for start, stop in shards
+            ]
+            results = [future.result() for future in futures]
+
+        total = sum(count for _, count in results)
+        if total == 0:
+            return None, 0
+
+        # Stitch shards back together in page order
+        out = fitz.open()
+        for (start, stop), (shard_bytes, _) in zip(shards, results):
+            if shard_bytes is None:
+                out.insert_pdf(src, from_page=start, to_page=stop - 1)
+            else:
+                shard = fitz.open(stream=shard_bytes, filetype="pdf")
+                out.insert_pdf(shard)
+                shard.close()
+        _restore_links(src, out)
+        out.set_metadata(src.metadata)
+        toc = src.get_toc(simple=False)
+        if toc:
+            out.set_toc(toc)
+        data = out.tobytes()
+        out.close()
+        return data, total
+    finally:
+        src.close()
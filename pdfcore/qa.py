@@ -0,0 +1,197 @@
+import asyncio
+
+import openai
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+SYSTEM_PROMPT = "You are a helpful financial assistant. Analyze the following document text."
+
+# Token budget for the document text sent in a single call
+CHUNK_TOKENS = 3000
+MAX_CONCURRENCY = 4
+
+NOTHING_RELEVANT = "NONE"
+
+
+def estimate_tokens(text):
+    """
+    Token count via tiktoken when it is installed, else ~4 characters per token.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return len(text) // 4 + 1
+    return len(tiktoken.get_encoding("cl100k_base").encode(text, disallowed_special=()))
+
+
+def _hard_cut(line, max_tokens):
+    # ~4 characters per token, shrunk until the estimate fits (the estimate
+    # rounds up, and dense text can take more than one token per character)
+    start = 0
+    while start < len(line):
+        step = max_tokens * 4
+        while step > 1 and estimate_tokens(line[start:start + step]) > max_tokens:
+            step = step * 3 // 4
+        yield line[start:start + step]
+        start += step
+
+
+def _split_oversized(text, max_tokens):
+    # A single page over budget is split on lines, then hard-cut
+    piece = []
+    size = 0
+    for line in text.splitlines(keepends=True):
+        tokens = estimate_tokens(line)
+        if tokens > max_tokens:
+            if piece:
+                yield "".join(piece)
+                piece, size = [], 0
+            yield from _hard_cut(line, max_tokens)
+            continue
+        if piece and size + tokens > max_tokens:
+            yield "".join(piece)
+            piece, size = [], 0
+        piece.append(line)
+        size += tokens
+    if piece:
+        yield "".join(piece)
+
+
+def chunk_pages(page_texts, max_tokens=CHUNK_TOKENS):
+    """
+    Packs consecutive pages into chunks of at most max_tokens, each page
+    under a "--- Page N ---" header so answers can cite pages.
+    Returns a list of chunk strings.
+    """
+    chunks = []
+    current = []
+    size = 0
+    for pno, text in enumerate(page_texts, start=1):
+        block = f"--- Page {pno} ---\n{text.strip()}\n"
+        tokens = estimate_tokens(block)
+        if tokens > max_tokens:
+            if current:
+                chunks.append("".join(current))
+                current, size = [], 0
+            chunks.extend(f"--- Page {pno} ---\n{part}" for part in _split_oversized(text, max_tokens))
+            continue
+        if current and size + tokens > max_tokens:
+            chunks.append("".join(current))
+            current, size = [], 0
+        current.append(block)
+        size += tokens
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+
+class OpenAIChatClient:
+    """
+    Async chat client for map_reduce_answer().
+
+    Any object with `async complete(messages) -> str` can be used instead;
+    base_url points this one at an OpenAI-compatible server (e.g. a local
+    stub in tests).
+    """
+
+    def __init__(self, api_key=None, base_url=None, model=DEFAULT_MODEL):
+        self.model = model
+        self._client = openai.AsyncOpenAI(api_key=api_key, base_url=base_url)
+
+    async def complete(self, messages):
+        response = await self._client.chat.completions.create(model=self.model, messages=messages)
+        return response.choices[0].message.content
+
+
+def _direct_messages(question, text):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Document Content:\n{text}\n\nQuestion: {question}"},
+    ]
+
+
+def _map_messages(question, chunk, part, parts):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": (
+            f"This is part {part} of {parts} of a document.\n\n{chunk}\n\n"
+            f"Question: {question}\n\n"
+            "Write down everything in this part that helps answer the question, "
+            "quoting figures, dates and page numbers exactly. "
+            f"If nothing in this part is relevant, reply with just {NOTHING_RELEVANT}."
+        )},
+    ]
+
+
+def _reduce_messages(question, notes):
+    joined = "\n\n".join(f"[Notes {i}]\n{note}" for i, note in enumerate(notes, start=1))
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": (
+            f"Notes taken from different parts of one document:\n\n{joined}\n\n"
+            f"Question: {question}\n\n"
+            "Answer the question using only these notes. Combine figures across "
+            "notes where the question asks for totals."
+        )},
+    ]
+
+
+async def map_reduce_answer(question, chunks, client, max_concurrency=MAX_CONCURRENCY, max_tokens=CHUNK_TOKENS):
+    """
+    Answers question over all chunks: one call per chunk (at most
+    max_concurrency in flight), then the partial answers are reduced -
+    in several rounds if they do not fit in one call.
+    """
+    if not chunks:
+        return ""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def call(messages):
+        async with semaphore:
+            return await client.complete(messages)
+
+    if len(chunks) == 1:
+        return await call(_direct_messages(question, chunks[0]))
+
+    notes = await asyncio.gather(*(
+        call(_map_messages(question, chunk, i, len(chunks)))
+        for i, chunk in enumerate(chunks, start=1)
+    ))
+    notes = [n for n in notes if n and n.strip().upper() != NOTHING_RELEVANT] or [NOTHING_RELEVANT]
+
+    # Reduce in rounds until all notes fit in one call
+    while len(notes) > 1 and estimate_tokens("\n\n".join(notes)) > max_tokens:
+        groups = []
+        group, size = [], 0
+        for note in notes:
+            tokens = estimate_tokens(note)
+            if group and size + tokens > max_tokens:
+                groups.append(group)
+                group, size = [], 0
+            group.append(note)
+            size += tokens
+        groups.append(group)
+        if len(groups) == len(notes):
+            # Every note is already at the budget; stop merging
+            break
+        notes = await asyncio.gather(*(call(_reduce_messages(question, g)) for g in groups))
+
+    return await call(_reduce_messages(question, notes))
+
+
+def answer_from_text(question, text, client):
+    """
+    Single call with text as the document content, e.g. retrieved passages.
+    """
+    return asyncio.run(client.complete(_direct_messages(question, text)))
+
+
+def answer_question(question, page_texts, client, max_concurrency=MAX_CONCURRENCY, max_tokens=CHUNK_TOKENS):
+    """
+    Synchronous entry point: chunks the pages and runs map_reduce_answer.
+    Returns (answer, chunk_count).
+    """
+    chunks = chunk_pages(page_texts, max_tokens=max_tokens)
+    answer = asyncio.run(map_reduce_answer(
+        question, chunks, client, max_concurrency=max_concurrency, max_tokens=max_tokens
+    ))
+    return answer, len(chunks)
@@ -0,0 +1,107 @@
+import os
+import threading
+from collections import OrderedDict
+
+import fitz  # PyMuPDF
+
+THUMBNAIL_ZOOM = 0.35
+PREVIEW_ZOOM = 1.5
+HIGHLIGHT_COLOR = (1, 0.85, 0)
+DEFAULT_MAX_BYTES = int(os.getenv("PDF_THUMBNAIL_CACHE_MB", "128")) * 1024 * 1024
+
+
+class RenderCache:
+    """
+    LRU cache of rendered PNGs keyed by (document hash, page, zoom,
+    highlight key), evicting least recently used images beyond max_bytes.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None:
+                self._images.move_to_end(key)
+            return png
+
+    def put(self, key, png):
+        with self._lock:
+            old = self._images.pop(key, None)
+            if old is not None:
+                self.nbytes -= len(old)
+            self._images[key] = png
+            self.nbytes += len(png)
+            while self.nbytes > self.max_bytes and len(self._images) > 1:
+                _, evicted = self._images.popitem(last=False)
+                self.nbytes -= len(evicted)
+
+
+def _render(cached, pno, zoom, highlights):
+    matrix = fitz.Matrix(zoom, zoom)
+    with cached.lock:
+        if not highlights:
+            return cached.doc.load_page(pno).get_pixmap(matrix=matrix, alpha=False).tobytes("png")
+        # Draw highlights on a one-page copy so the shared document stays untouched
+        scratch = fitz.open()
+        scratch.insert_pdf(cached.doc, from_page=pno, to_page=pno)
+    try:
+        page = scratch[0]
+        shape = page.new_shape()
+        for rect in highlights:
+            shape.draw_rect(fitz.Rect(rect) * page.derotation_matrix)
+        shape.finish(color=None, fill=HIGHLIGHT_COLOR, fill_opacity=0.4)
+        shape.commit(overlay=True)
+        return page.get_pixmap(matrix=matrix, alpha=False).tobytes("png")
+    finally:
+        scratch.close()
+
+
+def render_page(cached, pno, zoom=THUMBNAIL_ZOOM, highlights=None, highlight_key=None, cache=None):
+    """
+    PNG of one page of a CachedDocument, rendered on first request only.
+
+    highlights are (x0, y0, x1, y1) rects to mark, e.g. TextIndex matches;
+    highlight_key (such as the query) identifies them in the cache key;
+    without one the rects themselves are used.
+    """
+    cache = cache or get_render_cache()
+    if not highlights:
+        marks = None
+    elif highlight_key is not None:
+        marks = ("key", highlight_key)
+    else:
+        marks = ("rects", tuple(map(tuple, highlights)))
+    key = (cached.key, pno, round(zoom, 3), marks)
+    png = cache.get(key)
+    if png is None:
+        png = _render(cached, pno, zoom, highlights)
+        cache.put(key, png)
+    return png
+
+
+def screen_pages(page_count, screen, per_screen):
+    """
+    Page numbers shown on the given 0-based screen; only these are rendered.
+    """
+    start = screen * per_screen
+    return range(min(start, page_count), min(start + per_screen, page_count))
+
+
+_render_cache = None
+_render_cache_lock = threading.Lock()
+
+
+def get_render_cache():
+    """
+    Process-wide render cache shared by every session.
+    """
+    global _render_cache
+    with _render_cache_lock:
+        if _render_cache is None:
+            _render_cache = RenderCache()
+        return _render_cache
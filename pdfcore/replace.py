@@ -0,0 +1,89 @@
+import fitz  # PyMuPDF
+
+# Replacement text is drawn with the same heuristics the editor has always
+# used: font size from the hit height, baseline at 75% of it.
+FONT_SCALE = 0.8
+BASELINE_SCALE = 0.75
+
+# Redactions applied per apply_redactions() call. Adding a redaction and
+# applying them both slow down with the number pending on the page, so
+# applying all of a dense page's hits at once is quadratic in the hits.
+REDACT_BATCH = 64
+
+
+def find_hits(page, find_text, match_case=False):
+    """
+    Returns the rects of every occurrence of find_text on the page.
+
+    page.search_for() ignores case, so with match_case the hits whose text
+    differs in case from find_text are dropped.
+    """
+    hits = page.search_for(find_text)
+    if match_case:
+        hits = [rect for rect in hits if find_text in page.get_textbox(rect)]
+    return hits
+
+
+def replace_on_page(page, find_text, replace_text, hits=None, match_case=False):
+    """
+    Replaces every hit on a single page.
+
+    Hits are redacted in batches of REDACT_BATCH, each applied with one
+    apply_redactions() call, instead of one call per hit; the replacement
+    text is then written in a single Shape commit. Every apply still
+    rewrites the page's content stream, so the cost per hit grows with
+    the amount of content on the page, but far more slowly than with
+    per-hit or all-at-once apply_redactions().
+    Returns the number of replaced hits.
+    """
+    if hits is None:
+        hits = find_hits(page, find_text, match_case=match_case)
+    if not hits:
+        return 0
+
+    # 1. Redact (white out) the hits, a batch per apply
+    for start in range(0, len(hits), REDACT_BATCH):
+        for rect in hits[start:start + REDACT_BATCH]:
+            page.add_redact_annot(rect, fill=(1, 1, 1))
+        page.apply_redactions()
+
+    # 2. Insert all replacement text in one pass. A Shape uses the base-14
+    # font by reference (like page.insert_text) and commits a single stream.
+    if replace_text:
+        shape = page.new_shape()
+        for rect in hits:
+            shape.insert_text(
+                rect.tl + (0, rect.height * BASELINE_SCALE),
+                replace_text,
+                fontsize=rect.height * FONT_SCALE,
+                color=(0, 0, 0),
+            )
+        shape.commit()
+
+    return len(hits)
+
+
+def replace_in_document(doc, find_text, replace_text, match_case=False):
+    """
+    Replaces find_text with replace_text on every page of an open document.
+    Returns the total number of replaced hits.
+    """
+    count = 0
+    for page in doc:
+        count += replace_on_page(page, find_text, replace_text, match_case=match_case)
+    return count
+
+
+def replace_in_pdf(pdf_bytes, find_text, replace_text, match_case=False):
+    """
+    Convenience wrapper for raw PDF bytes.
+    Returns (output_bytes, count); output_bytes is None when nothing matched.
+    """
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        count = replace_in_document(doc, find_text, replace_text, match_case=match_case)
+        if count == 0:
+            return None, 0
+        return doc.tobytes(), count
+    finally:
+        doc.close()
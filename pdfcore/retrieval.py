@@ -0,0 +1,164 @@
+import heapq
+import math
+import re
+from collections import Counter, namedtuple
+
+from pdfcore.qa import _split_oversized, estimate_tokens
+
+# page is 1-based
+Passage = namedtuple("Passage", ["page", "text"])
+
+PASSAGE_TOKENS = 300
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def _pieces(text, max_tokens):
+    # Paragraphs, with any paragraph over budget split on lines (fitz
+    # separates lines with single newlines, so a page is often one paragraph)
+    for para in re.split(r'\n\s*\n', text):
+        para = para.strip()
+        if not para:
+            continue
+        tokens = estimate_tokens(para)
+        if tokens <= max_tokens:
+            yield para, tokens
+            continue
+        for piece in _split_oversized(para, max_tokens):
+            piece = piece.strip()
+            if piece:
+                yield piece, estimate_tokens(piece)
+
+
+def split_passages(page_texts, max_tokens=PASSAGE_TOKENS):
+    """
+    Splits every page into passages of at most max_tokens: paragraphs,
+    oversized ones cut on line boundaries; short paragraphs on the same page
+    are packed together.
+    """
+    passages = []
+    for pno, text in enumerate(page_texts, start=1):
+        current = []
+        size = 0
+        for piece, tokens in _pieces(text, max_tokens):
+            # +1 for the newline joining it to the previous piece
+            if current and size + 1 + tokens > max_tokens:
+                passages.append(Passage(pno, "\n".join(current)))
+                current, size = [], 0
+            size += tokens + (1 if current else 0)
+            current.append(piece)
+        if current:
+            passages.append(Passage(pno, "\n".join(current)))
+    return passages
+
+
+class BM25:
+    """
+    Okapi BM25 over a list of token lists; pure Python, no network.
+    """
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}  # term -> [(doc, term frequency)]
+        self.lengths = []
+        for doc_id, tokens in enumerate(documents):
+            self.lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self.postings.setdefault(term, []).append((doc_id, tf))
+        count = len(self.lengths)
+        self.avg_length = (sum(self.lengths) / count) if count else 0
+        self.idf = {
+            term: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def scores(self, query_tokens):
+        """
+        Returns {doc_id: score} for documents containing any query term.
+        """
+        scores = {}
+        for term in set(query_tokens):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / self.avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+
+class EmbeddingBackend:
+    """
+    Optional dense retrieval with a local sentence-transformers model.
+    Requires sentence-transformers (and the model files) to be installed.
+    """
+
+    def __init__(self, texts, model_name=DEFAULT_EMBEDDING_MODEL):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError("Embedding retrieval requires sentence-transformers: pip install sentence-transformers")
+        self.model = SentenceTransformer(model_name)
+        self.vectors = self.model.encode(texts, normalize_embeddings=True)
+
+    def scores(self, query):
+        query_vector = self.model.encode([query], normalize_embeddings=True)[0]
+        return dict(enumerate((self.vectors @ query_vector).tolist()))
+
+
+class RetrievalIndex:
+    """
+    Per-document passage index: BM25 always, fused with embedding scores by
+    reciprocal rank when an embedding backend is enabled.
+    """
+
+    RRF_K = 60
+
+    def __init__(self, passages, embeddings=False, model_name=DEFAULT_EMBEDDING_MODEL):
+        self.passages = passages
+        self.bm25 = BM25([tokenize(p.text) for p in passages])
+        self.embedding = EmbeddingBackend([p.text for p in passages], model_name) if embeddings else None
+        self.nbytes = sum(len(p.text) * 3 for p in passages)
+
+    @classmethod
+    def from_pages(cls, page_texts, embeddings=False):
+        return cls(split_passages(page_texts), embeddings=embeddings)
+
+    @classmethod
+    def from_cached(cls, cached, embeddings=False):
+        """
+        Builder for CachedDocument.get_index(); reuses the cached page text.
+        """
+        return cls.from_pages((cached.page_text(pno) for pno in range(cached.page_count)), embeddings)
+
+    def _ranked(self, scores):
+        return sorted(scores, key=scores.get, reverse=True)
+
+    def search(self, query, top_k=8):
+        """
+        Returns up to top_k Passages, most relevant first.
+        """
+        bm25 = self.bm25.scores(tokenize(query))
+        if self.embedding is None:
+            best = heapq.nlargest(top_k, bm25, key=bm25.get)
+        else:
+            fused = {}
+            for ranking in (self._ranked(bm25), self._ranked(self.embedding.scores(query))):
+                for rank, doc_id in enumerate(ranking):
+                    fused[doc_id] = fused.get(doc_id, 0.0) + 1 / (self.RRF_K + rank + 1)
+            best = heapq.nlargest(top_k, fused, key=fused.get)
+        return [self.passages[i] for i in best]
+
+
+def format_context(passages):
+    """
+    Joins retrieved passages in document order with page headers.
+    """
+    ordered = sorted(passages, key=lambda p: p.page)
+    return "\n\n".join(f"--- Page {p.page} ---\n{p.text}" for p in ordered)
@@ -0,0 +1,73 @@
+import os
+import shutil
+
+import fitz  # PyMuPDF
+from pypdf import PdfReader, PdfWriter
+
+from pdfcore.page_ranges import parse_page_ranges
+
+
+def _select_pages(pages, page_count):
+    # pages: None (all), a range spec such as "1-10, 15, 20-", or 0-based indices
+    if pages is None:
+        return list(range(page_count))
+    if isinstance(pages, str):
+        return parse_page_ranges(pages, page_count)
+    return sorted(set(pages))
+
+
+def rotate_pdf(source, output, angle, pages=None):
+    """
+    Rotates the selected pages (see _select_pages) clockwise by angle by
+    rewriting the whole document to output (path or binary file object).
+    Returns the number of rotated pages.
+    """
+    reader = source if isinstance(source, PdfReader) else PdfReader(source)
+    selected = set(_select_pages(pages, len(reader.pages)))
+    writer = PdfWriter()
+    try:
+        rotated = 0
+        for i, page in enumerate(reader.pages):
+            if i in selected:
+                page.rotate(angle)
+                rotated += 1
+            writer.add_page(page)
+        writer.write(output)
+        return rotated
+    finally:
+        writer.close()
+
+
+def rotate_incremental(path, angle, pages=None, output_path=None):
+    """
+    Rotates the selected pages clockwise by angle with an incremental
+    update: only the changed page dictionaries and a new xref section are
+    appended to the file, so the cost does not depend on the file size.
+
+    The file at path is updated in place unless output_path is given, in
+    which case the original is copied there first. Damaged, encrypted or
+    otherwise non-incremental files fall back to a full rewrite.
+    Returns (rotated_count, incremental).
+    """
+    if output_path and os.path.abspath(output_path) != os.path.abspath(path):
+        shutil.copyfile(path, output_path)
+        path = output_path
+
+    doc = fitz.open(path)
+    try:
+        selected = _select_pages(pages, doc.page_count)
+        for pno in selected:
+            page = doc[pno]
+            page.set_rotation((page.rotation + angle) % 360)
+
+        if not doc.is_repaired and not doc.needs_pass and doc.can_save_incrementally():
+            doc.saveIncr()
+            return len(selected), True
+
+        # Full rewrite via a sibling temp file, then swap it in
+        tmp_path = path + ".rewrite"
+        doc.save(tmp_path, garbage=1)
+    finally:
+        doc.close()
+    os.replace(tmp_path, path)
+    return len(selected), False
@@ -0,0 +1,148 @@
+import io
+import mmap
+import os
+import shutil
+import tempfile
+
+import fitz  # PyMuPDF
+from pypdf import PdfReader
+
+# File objects larger than this are spooled to a temp file and memory-mapped
+# instead of being read into memory.
+MMAP_THRESHOLD = int(os.getenv("PDF_MMAP_THRESHOLD_MB", "64")) * 1024 * 1024
+
+
+class BufferReader(io.RawIOBase):
+    """
+    Read-only, seekable file object over a memoryview. read() returns only
+    the requested slice, so pypdf can parse a shared buffer without first
+    copying it into a BytesIO.
+    """
+
+    def __init__(self, view):
+        self._view = view
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        chunk = self._view[self._pos:self._pos + len(b)]
+        n = len(chunk)
+        b[:n] = chunk
+        self._pos += n
+        return n
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        data = self._view[self._pos:end].tobytes()
+        self._pos = max(self._pos, end)
+        return data
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = len(self._view) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if self._pos < 0:
+            raise ValueError("Negative seek position")
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
+class DocumentSource:
+    """
+    One read-only buffer holding a PDF (bytes or a memory-mapped file),
+    shared by fitz and pypdf without further copies.
+
+    open_fitz() returns a new document over the shared buffer on every call.
+    MuPDF keeps edits in its own objects and never writes to the buffer, so
+    each such document is a copy-on-write clone: edit it freely, the source
+    and every other reader stay unchanged.
+    """
+
+    def __init__(self, buffer, name=None, path=None):
+        self._buffer = buffer
+        self.view = memoryview(buffer).toreadonly()
+        self.name = name
+        # Set for sources backed by a file that stays on disk (from_path)
+        self.path = path
+
+    @classmethod
+    def from_bytes(cls, data, name=None):
+        return cls(data, name=name)
+
+    @classmethod
+    def from_path(cls, path):
+        """
+        Memory-maps the file at path: pages are read from disk on demand and
+        can be dropped again by the OS under memory pressure.
+        """
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls(b"", name=os.path.basename(path), path=path)
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, name=os.path.basename(path), path=path)
+
+    @classmethod
+    def from_fileobj(cls, fileobj, spool_dir=None):
+        """
+        Wraps an upload or other binary file object.
+
+        In-memory uploads (BytesIO, Streamlit's UploadedFile) share their
+        existing buffer. Other file objects above MMAP_THRESHOLD are spooled
+        to an unlinked temp file and memory-mapped; smaller ones are read.
+        """
+        name = getattr(fileobj, "name", None)
+        if isinstance(fileobj, io.BytesIO):
+            # getvalue() hands out the BytesIO's own bytes object when it can
+            return cls(fileobj.getvalue(), name=name)
+
+        fileobj.seek(0, io.SEEK_END)
+        size = fileobj.tell()
+        fileobj.seek(0)
+        if size <= MMAP_THRESHOLD:
+            return cls(fileobj.read(), name=name)
+
+        with tempfile.TemporaryFile(dir=spool_dir) as spool:
+            shutil.copyfileobj(fileobj, spool, 1024 * 1024)
+            spool.flush()
+            # The mapping stays valid after the temp file is closed and removed
+            buffer = mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, name=name)
+
+    @property
+    def nbytes(self):
+        return len(self.view)
+
+    def open_fitz(self):
+        """
+        New fitz document over the shared buffer (a copy-on-write clone).
+        """
+        return fitz.open(stream=self.view, filetype="pdf")
+
+    def open_pypdf(self):
+        return PdfReader(BufferReader(self.view))
+
+    def reader(self):
+        """
+        Independent read-only file object over the buffer.
+        """
+        return BufferReader(self.view)
+
+    def write_to(self, path):
+        """
+        Writes the buffer to path, e.g. for in-place incremental edits.
+        """
+        with open(path, "wb") as f:
+            f.write(self.view)
+        return path
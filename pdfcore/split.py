@@ -0,0 +1,126 @@
+import os
+import re
+import zipfile
+
+import fitz  # PyMuPDF
+
+from pdfcore.optimize import SAVE_OPTIONS
+from pdfcore.page_ranges import parse_page_ranges
+
+
+def groups_from_ranges(spec, page_count):
+    """
+    One output per ';'-separated part: "1-10; 11-20; 21-" gives three files,
+    and a part may list several ranges ("1-3, 7").
+    Returns [(label, [0-based pages])].
+    """
+    groups = []
+    for part in spec.split(";"):
+        if part.strip():
+            pages = parse_page_ranges(part, page_count)
+            groups.append((f"pages_{pages[0] + 1}-{pages[-1] + 1}", pages))
+    if not groups:
+        raise ValueError("No page ranges given.")
+    return groups
+
+
+def groups_every(page_count, every):
+    """
+    Consecutive chunks of `every` pages.
+    """
+    if every < 1:
+        raise ValueError("Pages per file must be at least 1.")
+    return [
+        (f"pages_{start + 1}-{min(start + every, page_count)}", list(range(start, min(start + every, page_count))))
+        for start in range(0, page_count, every)
+    ]
+
+
+def groups_by_bookmark(doc, level=1):
+    """
+    One output per bookmark at the given outline level, running until the
+    next bookmark at that level (pages before the first one are skipped).
+    """
+    starts = []
+    for entry_level, title, page in doc.get_toc(simple=True):
+        if entry_level == level and page >= 1:
+            starts.append((title, page - 1))
+    starts.sort(key=lambda s: s[1])
+    groups = []
+    for i, (title, start) in enumerate(starts):
+        stop = starts[i + 1][1] if i + 1 < len(starts) else doc.page_count
+        if stop > start:
+            groups.append((title, list(range(start, stop))))
+    if not groups:
+        raise ValueError(f"No level-{level} bookmarks found.")
+    return groups
+
+
+def _runs(pages):
+    # [0, 1, 2, 5, 6] -> [(0, 2), (5, 6)]
+    runs = []
+    for pno in pages:
+        if runs and pno == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], pno)
+        else:
+            runs.append((pno, pno))
+    return runs
+
+
+def safe_filename(label):
+    name = re.sub(r'[^\w\-. ]+', "_", label).strip(" ._")
+    return name[:80] or "part"
+
+
+def iter_split(src, groups):
+    """
+    Yields (label, pdf_bytes) per group from one open source document.
+
+    The source is parsed once; each output only receives the objects
+    (fonts, images, ...) its own pages reference, and the optimizing save
+    drops anything left unused.
+    """
+    for label, pages in groups:
+        out = fitz.open()
+        try:
+            for first, last in _runs(pages):
+                out.insert_pdf(src, from_page=first, to_page=last)
+            yield label, out.tobytes(**SAVE_OPTIONS)
+        finally:
+            out.close()
+
+
+def _numbered(groups, prefix):
+    # Unique, ordered file names for the groups
+    width = max(3, len(str(len(groups))))
+    return [
+        (f"{prefix}{i:0{width}d}_{safe_filename(label)}.pdf", pages)
+        for i, (label, pages) in enumerate(groups, start=1)
+    ]
+
+
+def split_to_dir(src, groups, out_dir, prefix=""):
+    """
+    Writes one PDF per group into out_dir. Returns the written paths.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for name, data in iter_split(src, _numbered(groups, prefix)):
+        path = os.path.join(out_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        paths.append(path)
+    return paths
+
+
+def split_to_zip(src, groups, fileobj, prefix=""):
+    """
+    Writes one PDF per group into a zip archive on fileobj.
+    Returns the number of files written.
+    """
+    count = 0
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_STORED) as archive:
+        for name, data in iter_split(src, _numbered(groups, prefix)):
+            archive.writestr(name, data)
+            count += 1
+    return count
@@ -0,0 +1,238 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from pdfcore.analyzer import DATE_RE, iter_lines, iter_pages
+
+AMOUNT_CELL_RE = re.compile(r'^\(?-?\$?\s?\d{1,3}(?:,\d{3})*\.\d{2}\)?-?$')
+
+# Header words that name a column's role
+HEADER_ROLES = {
+    "date": "date",
+    "description": "description",
+    "details": "description",
+    "transaction": "description",
+    "debit": "debit",
+    "debits": "debit",
+    "withdrawal": "debit",
+    "withdrawals": "debit",
+    "credit": "credit",
+    "credits": "credit",
+    "deposit": "credit",
+    "deposits": "credit",
+    "amount": "amount",
+    "balance": "balance",
+}
+
+
+def _cells(words, gap_factor=0.6):
+    """
+    Merges neighbouring words of one line into cells; a horizontal gap wider
+    than gap_factor * word height starts a new cell.
+    Returns [(x0, x1, text)].
+    """
+    cells = []
+    for w in words:
+        if cells and w[0] - cells[-1][1] <= (w[3] - w[1]) * gap_factor:
+            x0, _, text = cells[-1]
+            cells[-1] = (x0, w[2], f"{text} {w[4]}")
+        else:
+            cells.append((w[0], w[2], w[4]))
+    return cells
+
+
+def _column_bands(rows):
+    """
+    Column boundaries for a page: the union of overlapping cell x-ranges
+    across all rows with more than one cell, so titles and other full-width
+    lines do not glue columns together. Returns sorted [(x0, x1)].
+    """
+    spans = sorted((x0, x1) for cells in rows if len(cells) > 1 for x0, x1, _ in cells)
+    bands = []
+    for x0, x1 in spans:
+        if bands and x0 <= bands[-1][1]:
+            bands[-1] = (bands[-1][0], max(bands[-1][1], x1))
+        else:
+            bands.append((x0, x1))
+    return bands
+
+
+def page_table(page, page_number):
+    """
+    Groups a page's words into rows (visual lines) and columns (x bands).
+    Returns a DataFrame with page, y and one text column per band (c0..cN).
+    """
+    rows = []
+    ys = []
+    for words in iter_lines(page):
+        rows.append(_cells(words))
+        ys.append(min(w[1] for w in words))
+    if not rows:
+        return pd.DataFrame()
+
+    bands = _column_bands(rows)
+    records = []
+    for y, cells in zip(ys, rows):
+        record = {"page": page_number, "y": round(y, 2)}
+        for x0, x1, text in cells:
+            # Last band starting at or before the cell (single-cell rows may fall between bands)
+            band = max([i for i, (b0, _) in enumerate(bands) if b0 <= x0] or [0])
+            key = f"c{band}"
+            record[key] = f"{record[key]} {text}" if key in record else text
+        records.append(record)
+    return pd.DataFrame.from_records(records)
+
+
+def parse_amounts(series):
+    """
+    Vectorized amount parsing: "$1,200.00" -> 1200.0, "(12.50)" / "12.50-" -> -12.5.
+    Anything unparseable becomes NaN.
+    """
+    s = series.astype("string").str.strip()
+    negative = s.str.startswith("(") | s.str.startswith("-") | s.str.endswith("-")
+    values = pd.to_numeric(s.str.replace(r'[^\d.]', '', regex=True), errors="coerce")
+    return values.where(~negative.fillna(False), -values)
+
+
+def _roles(frame, text_columns):
+    """
+    Decides which raw column holds the date, description and amounts, using
+    header words when a header row exists and value patterns otherwise.
+    """
+    roles = {}
+    for _, row in frame[text_columns].iterrows():
+        found = {}
+        for col in text_columns:
+            value = row[col]
+            if isinstance(value, str):
+                for word in re.findall(r'[a-z]+', value.lower()):
+                    if word in HEADER_ROLES:
+                        found.setdefault(HEADER_ROLES[word], col)
+        if "balance" in found or len(found) >= 3:
+            roles = {role: col for role, col in found.items()}
+            break
+
+    dates = {}
+    amounts = []
+    for col in text_columns:
+        s = frame[col].dropna().astype(str)
+        if s.empty:
+            continue
+        if s.str.fullmatch(DATE_RE.pattern).mean() > 0.5:
+            dates[col] = len(s)
+        elif s.str.strip().str.match(AMOUNT_CELL_RE.pattern).mean() > 0.5:
+            amounts.append(col)
+
+    if "date" not in roles and dates:
+        roles["date"] = max(dates, key=dates.get)
+    if not any(r in roles for r in ("amount", "debit", "credit", "balance")):
+        if len(amounts) >= 3:
+            roles.update(debit=amounts[-3], credit=amounts[-2], balance=amounts[-1])
+        elif len(amounts) == 2:
+            roles.update(amount=amounts[0], balance=amounts[1])
+        elif amounts:
+            roles["amount"] = amounts[0]
+    if "description" not in roles:
+        used = set(roles.values())
+        text = [c for c in text_columns if c not in used]
+        if text:
+            roles["description"] = max(text, key=lambda c: frame[c].dropna().astype(str).str.len().sum())
+    return roles
+
+
+def transactions_frame(page_frame):
+    """
+    Turns one page's raw table into typed transaction rows: date, description,
+    amount (signed; credit - debit when split), balance and balance_ok.
+    Lines without a date are folded into the previous row's description.
+    """
+    if page_frame.empty:
+        return pd.DataFrame()
+    text_columns = [c for c in page_frame.columns if c.startswith("c")]
+    roles = _roles(page_frame, text_columns)
+    if "date" not in roles:
+        return pd.DataFrame()
+
+    frame = pd.DataFrame({"page": page_frame["page"], "y": page_frame["y"]})
+    frame["date"] = pd.to_datetime(
+        page_frame[roles["date"]].astype("string").str.extract(f"({DATE_RE.pattern})", expand=False),
+        errors="coerce",
+        format="mixed",
+    )
+    desc_col = roles.get("description")
+    frame["description"] = page_frame[desc_col].fillna("").astype(str) if desc_col else ""
+    for role in ("amount", "debit", "credit", "balance"):
+        if role in roles:
+            frame[role] = parse_amounts(page_frame[roles[role]])
+
+    # Rows start at a dated line; continuation lines extend the description
+    frame = frame[frame["date"].notna().cumsum() > 0]
+    group = frame["date"].notna().cumsum()
+    numeric = [c for c in ("amount", "debit", "credit", "balance") if c in frame]
+    agg = {"page": "first", "y": "first", "date": "first", "description": " ".join}
+    agg.update({c: "first" for c in numeric})
+    frame = frame.groupby(group, sort=False).agg(agg).reset_index(drop=True)
+    frame["description"] = frame["description"].str.split().str.join(" ")
+
+    if "amount" not in frame:
+        if "credit" in frame or "debit" in frame:
+            credit = frame["credit"].fillna(0) if "credit" in frame else 0
+            debit = frame["debit"].fillna(0) if "debit" in frame else 0
+            frame["amount"] = credit - debit
+        else:
+            frame["amount"] = np.nan
+    if "balance" not in frame:
+        frame["balance"] = np.nan
+    return frame[["page", "y", "date", "description", "amount", "balance"]]
+
+
+def validate_balances(frame, tolerance=0.005):
+    """
+    Adds balance_ok: whether previous balance + amount equals this balance.
+    Unsigned amount columns (no negatives at all) also accept a subtraction.
+    The first row and rows without a balance are left as NA.
+    """
+    frame = frame.copy()
+    previous = frame["balance"].shift()
+    ok = np.isclose(previous + frame["amount"], frame["balance"], atol=tolerance)
+    if not (frame["amount"] < 0).any():
+        ok |= np.isclose(previous - frame["amount"], frame["balance"], atol=tolerance)
+    known = previous.notna() & frame["balance"].notna() & frame["amount"].notna()
+    frame["balance_ok"] = pd.Series(ok, index=frame.index).where(known).astype("boolean")
+    return frame
+
+
+def extract_transactions(doc):
+    """
+    Layout-aware transaction table for the whole document, one page at a time.
+    """
+    pages = [transactions_frame(page_table(page, pno + 1)) for pno, page in iter_pages(doc)]
+    pages = [p for p in pages if not p.empty]
+    if not pages:
+        return pd.DataFrame(columns=["page", "date", "description", "amount", "balance", "balance_ok"])
+    frame = pd.concat(pages, ignore_index=True)
+    return validate_balances(frame).drop(columns="y")
+
+
+class StatementTable:
+    """
+    Cached transaction table for a CachedDocument (see get_index).
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.nbytes = int(frame.memory_usage(deep=True).sum())
+
+    @classmethod
+    def from_cached(cls, cached):
+        with cached.lock:
+            return cls(extract_transactions(cached.doc))
+
+    def summary(self):
+        checked = self.frame["balance_ok"].dropna()
+        return {
+            "transactions": len(self.frame),
+            "balance_checks": len(checked),
+            "balance_mismatches": int((~checked.astype(bool)).sum()),
+        }
@@ -0,0 +1,145 @@
+from collections import namedtuple
+
+# One hit: page number and one rect (x0, y0, x1, y1) per word it spans.
+Match = namedtuple("Match", ["page", "rects"])
+
+# Rough per-word overhead of the tuples, lists and dict slots below, used
+# for the cache's size-based eviction.
+WORD_OVERHEAD_BYTES = 120
+
+
+class TextIndex:
+    """
+    Whole-document word/position index built from page.get_text("words").
+
+    Queries follow page.search_for() semantics closely: the query may start
+    or end inside a word ("2023" matches "12/01/2023") and whitespace in the
+    query matches any word break. Lookups go through the vocabulary instead
+    of re-laying out every page, so repeated queries are cheap.
+    """
+
+    def __init__(self, pages):
+        # pages: per page, a list of (x0, y0, x1, y1, text, ...) word tuples
+        self.pages = []
+        self.postings = {}  # exact word -> [(page, word_no)]
+        self.folded = {}    # lower-cased word -> [exact words]
+        nbytes = 0
+        for pno, words in enumerate(pages):
+            page_words = []
+            for wno, word in enumerate(words):
+                text = word[4]
+                page_words.append((text, tuple(word[:4])))
+                postings = self.postings.get(text)
+                if postings is None:
+                    postings = self.postings[text] = []
+                    self.folded.setdefault(text.lower(), []).append(text)
+                postings.append((pno, wno))
+                nbytes += len(text) + WORD_OVERHEAD_BYTES
+            self.pages.append(page_words)
+        self.nbytes = nbytes
+
+    @classmethod
+    def from_document(cls, doc):
+        return cls(page.get_text("words") for page in doc)
+
+    @classmethod
+    def from_cached(cls, cached):
+        """
+        Builder for CachedDocument.get_index().
+        """
+        with cached.lock:
+            return cls.from_document(cached.doc)
+
+    def _vocabulary(self, match_case):
+        if match_case:
+            return ((word, [word]) for word in self.postings)
+        return self.folded.items()
+
+    def _postings(self, words):
+        for word in words:
+            yield from self.postings[word]
+
+    def search(self, query, match_case=False):
+        """
+        Returns every Match of query, in page order.
+        """
+        tokens = query.split()
+        if not tokens:
+            return []
+        if not match_case:
+            tokens = [t.lower() for t in tokens]
+
+        matches = []
+        if len(tokens) == 1:
+            token = tokens[0]
+            for key, words in self._vocabulary(match_case):
+                start = key.find(token)
+                if start < 0:
+                    continue
+                offsets = []
+                while start >= 0:
+                    offsets.append(start)
+                    start = key.find(token, start + len(token))
+                for pno, wno in self._postings(words):
+                    text, rect = self.pages[pno][wno]
+                    for offset in offsets:
+                        matches.append(Match(pno, [_slice_rect(rect, len(text), offset, offset + len(token))]))
+        else:
+            first, middle, last = tokens[0], tokens[1:-1], tokens[-1]
+            for key, words in self._vocabulary(match_case):
+                if not key.endswith(first):
+                    continue
+                for pno, wno in self._postings(words):
+                    match = self._match_phrase(pno, wno, first, middle, last, match_case)
+                    if match is not None:
+                        matches.append(match)
+
+        matches.sort(key=lambda m: (m.page, m.rects[0][1], m.rects[0][0]))
+        return matches
+
+    def _match_phrase(self, pno, wno, first, middle, last, match_case):
+        words = self.pages[pno]
+        end = wno + len(middle) + 1
+        if end >= len(words):
+            return None
+        for offset, token in enumerate(middle, start=1):
+            text = words[wno + offset][0]
+            if (text if match_case else text.lower()) != token:
+                return None
+        last_text = words[end][0]
+        if not (last_text if match_case else last_text.lower()).startswith(last):
+            return None
+
+        first_text, first_rect = words[wno]
+        rects = [_slice_rect(first_rect, len(first_text), len(first_text) - len(first), len(first_text))]
+        rects.extend(words[i][1] for i in range(wno + 1, end))
+        rects.append(_slice_rect(words[end][1], len(last_text), 0, len(last)))
+        return Match(pno, rects)
+
+    def count(self, query, match_case=False):
+        return len(self.search(query, match_case=match_case))
+
+    def page_counts(self, query, match_case=False):
+        """
+        Returns {page: hit count} for pages with at least one hit.
+        """
+        return count_by_page(self.search(query, match_case=match_case))
+
+
+def count_by_page(matches):
+    """
+    Returns {page: hit count} for a list of Matches, in page order.
+    """
+    counts = {}
+    for match in matches:
+        counts[match.page] = counts.get(match.page, 0) + 1
+    return counts
+
+
+def _slice_rect(rect, length, start, stop):
+    # Approximate the sub-word box by character position
+    x0, y0, x1, y1 = rect
+    if length <= 0 or (start == 0 and stop >= length):
+        return rect
+    width = (x1 - x0) / length
+    return (x0 + width * start, y0, x0 + width * stop, y1)